@@ -6,17 +6,20 @@ extensions, blueprints, and security measures.
 """
 
 import os
+import stat
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from jinja2 import FileSystemBytecodeCache
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from config import config_by_name
 from app.utils.security import SecurityHeaders
 from app.utils.anonymization import AnonymizationService
+from app.utils.json_provider import OrjsonProvider
 
 
 def create_app(config_name=None):
@@ -33,7 +36,12 @@ def create_app(config_name=None):
         config_name = os.environ.get('FLASK_ENV', 'development')
     
     app = Flask(__name__)
-    app.config.from_object(config_by_name[config_name])
+    config_class = config_by_name[config_name]
+    app.config.from_object(config_class)
+    config_class.init_app(app)
+    
+    # Faster JSON encoding/decoding
+    app.json = OrjsonProvider(app)
     
     # Initialize Sentry for error tracking (production only)
     if config_name == 'production' and app.config.get('SENTRY_DSN'):
@@ -64,9 +72,41 @@ def create_app(config_name=None):
     # Add security headers
     SecurityHeaders.init_app(app)
     
+    # Share compiled templates across workers via an on-disk bytecode cache
+    if app.config.get('JINJA_BYTECODE_CACHE'):
+        app.jinja_env.bytecode_cache = create_bytecode_cache(
+            app, app.config.get('JINJA_BYTECODE_CACHE_DIR'))
+    
     return app
 
 
+def create_bytecode_cache(app, directory=None):
+    """
+    Create a Jinja bytecode cache in a private directory
+    
+    Cached bytecode is loaded and executed, so the directory must be owned by
+    this user and closed to everyone else.
+    
+    Args:
+        app (Flask): Application used for logging
+        directory (str): Cache directory, or None for Jinja's per-user default
+        
+    Returns:
+        FileSystemBytecodeCache: The cache, or None if the directory is unsafe
+    """
+    if directory is None:
+        # Jinja creates and verifies a 0700 per-user directory itself
+        return FileSystemBytecodeCache()
+    
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+            or st.st_mode & (stat.S_IRWXG | stat.S_IRWXO)):
+        app.logger.warning(f'Jinja bytecode cache disabled: {directory} is not a private directory')
+        return None
+    return FileSystemBytecodeCache(directory=directory)
+
+
 def init_extensions(app):
     """Initialize Flask extensions"""
     
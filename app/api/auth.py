@@ -218,10 +218,15 @@ def login():
         )
 
         # Update last login
-        firebase_service.update_user_profile_sync(user_id, {
+        login_updates = {
             'last_login': datetime.utcnow().isoformat(),
             'last_active': datetime.utcnow().isoformat()
-        })
+        }
+        # Upgrade hashes made with outdated parameters (e.g. passlib-era) while
+        # the plaintext password is at hand
+        if password_security.needs_rehash(stored_password_hash):
+            login_updates['password_hash'] = password_security.hash_password(password)
+        firebase_service.update_user_profile_sync(user_id, login_updates)
         access_logger.log_access(user_id, 'login', 'user_session', success=True)
         
         return jsonify({
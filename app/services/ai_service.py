@@ -10,13 +10,62 @@ This module provides secure integration with OpenAI API for:
 
 import openai
 import json
-from typing import Dict, List, Optional, Any
+import asyncio
+import tiktoken
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from flask import current_app
 
 from app.utils.security import input_sanitizer
 
 
+# Worker pool for sanitize/prompt-build CPU work so it doesn't stall the event loop
+_CPU_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Session histories longer than the threshold draw topics and skills from
+# only the most recent window of sessions
+_SESSION_SUMMARY_THRESHOLD = 200
+_SESSION_SUMMARY_WINDOW = 100
+
+# Prompt token budget: model context minus completion tokens and system/scaffolding text
+_PROMPT_CONTEXT_TOKENS = 4096
+_PROMPT_SCAFFOLD_TOKENS = 500
+_ENCODING_MODEL = 'gpt-4-turbo-preview'
+
+# Stable system message shared by every request; a constant prefix also
+# maximizes OpenAI-side prompt cache hits
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are an expert executive coach with 20+ years of experience in leadership development and professional coaching. You provide evidence-based, actionable insights and recommendations."
+}
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    """Lazy tiktoken encoder (loading the BPE ranks is expensive)"""
+    return tiktoken.encoding_for_model(_ENCODING_MODEL)
+
+
+@lru_cache(maxsize=10_000)
+def _count_tokens(text: str) -> int:
+    """Token length of a string, cached since roles/goals repeat across users"""
+    return len(_get_encoder().encode_ordinary(text))
+
+
+def _clip_list(items: List[Any], max_tokens: int) -> List[Any]:
+    """Greedily keep list items until the token budget is spent"""
+    clipped = []
+    used = 0
+    for item in items:
+        used += _count_tokens(str(item))
+        if used > max_tokens:
+            break
+        clipped.append(item)
+    return clipped
+
+
 class AICoachingService:
     """
     AI-powered coaching service using OpenAI GPT models
@@ -59,11 +108,10 @@ class AICoachingService:
         try:
             client = self._get_client()
             
-            # Prepare assessment data for AI analysis
-            sanitized_responses = self._sanitize_assessment_data(assessment_data)
-            
-            # Create AI prompt for assessment analysis
-            prompt = self._create_assessment_analysis_prompt(sanitized_responses)
+            # Sanitize and build the prompt off the event loop
+            prompt, sanitized_responses = await asyncio.get_running_loop().run_in_executor(
+                _CPU_POOL, self._prepare_assessment, assessment_data
+            )
             
             # Get AI analysis
             response = await self._get_ai_response(prompt, max_tokens=1500)
@@ -98,15 +146,13 @@ class AICoachingService:
             Comprehensive coaching plan with actionable steps
         """
         try:
-            # Sanitize input data
-            sanitized_profile = self._sanitize_profile_data(user_profile)
-            sanitized_goals = [input_sanitizer.sanitize_string(goal) for goal in goals]
-            
-            # Create coaching plan prompt
-            prompt = self._create_coaching_plan_prompt(
-                sanitized_profile, 
-                assessment_insights, 
-                sanitized_goals
+            # Sanitize input data and create coaching plan prompt off the event loop
+            prompt = await asyncio.get_running_loop().run_in_executor(
+                _CPU_POOL,
+                self._prepare_coaching_plan,
+                user_profile,
+                assessment_insights,
+                goals
             )
             
             # Get AI-generated plan
@@ -140,11 +186,10 @@ class AICoachingService:
             Personalized progress recommendations
         """
         try:
-            # Analyze session patterns
-            session_summary = self._summarize_sessions(user_sessions)
-            
-            # Create progress analysis prompt
-            prompt = self._create_progress_analysis_prompt(session_summary, current_goals)
+            # Analyze session patterns and create prompt off the event loop
+            prompt = await asyncio.get_running_loop().run_in_executor(
+                _CPU_POOL, self._prepare_progress_analysis, user_sessions, current_goals
+            )
             
             # Get AI recommendations
             response = await self._get_ai_response(prompt, max_tokens=1200)
@@ -176,8 +221,10 @@ class AICoachingService:
             Session preparation materials and discussion points
         """
         try:
-            # Create session preparation prompt
-            prompt = self._create_session_prep_prompt(upcoming_session, user_progress)
+            # Create session preparation prompt off the event loop
+            prompt = await asyncio.get_running_loop().run_in_executor(
+                _CPU_POOL, self._create_session_prep_prompt, upcoming_session, user_progress
+            )
             
             # Get AI-generated preparation materials
             response = await self._get_ai_response(prompt, max_tokens=1000)
@@ -193,6 +240,58 @@ class AICoachingService:
     
     # Private helper methods
     
+    def _clip_prompt_lists(self,
+                           data: Dict[str, Any],
+                           fields: List[str],
+                           max_tokens: int) -> Dict[str, Any]:
+        """Clip list-valued prompt fields so the prompt fits the model context"""
+        budget = _PROMPT_CONTEXT_TOKENS - max_tokens - _PROMPT_SCAFFOLD_TOKENS
+        per_field = max(budget // len(fields), 0)
+        clipped = dict(data)
+        for field in fields:
+            if isinstance(clipped.get(field), list):
+                clipped[field] = _clip_list(clipped[field], per_field)
+        return clipped
+    
+    def _prepare_assessment(self, assessment_data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Sanitize assessment data and build the analysis prompt (runs in _CPU_POOL)"""
+        sanitized_responses = self._sanitize_assessment_data(assessment_data)
+        prompt = self._create_assessment_analysis_prompt(
+            self._clip_prompt_lists(
+                sanitized_responses, ['main_challenges', 'skill_priorities'], max_tokens=1500
+            )
+        )
+        return prompt, sanitized_responses
+    
+    def _prepare_coaching_plan(self,
+                               user_profile: Dict[str, Any],
+                               assessment_insights: Dict[str, Any],
+                               goals: List[str]) -> str:
+        """Sanitize profile/goals and build the coaching plan prompt (runs in _CPU_POOL)"""
+        sanitized_profile = self._sanitize_profile_data(user_profile)
+        sanitized_goals = [input_sanitizer.sanitize_string(goal) for goal in goals]
+        clipped = self._clip_prompt_lists(
+            {**sanitized_profile, 'goals': sanitized_goals},
+            ['coaching_focus_areas', 'goals'],
+            max_tokens=2000
+        )
+        return self._create_coaching_plan_prompt(
+            clipped,
+            assessment_insights,
+            clipped['goals']
+        )
+    
+    def _prepare_progress_analysis(self,
+                                   user_sessions: List[Dict[str, Any]],
+                                   current_goals: List[str]) -> str:
+        """Summarize sessions and build the progress analysis prompt (runs in _CPU_POOL)"""
+        session_summary = self._clip_prompt_lists(
+            self._summarize_sessions(user_sessions),
+            ['topics_covered', 'skills_practiced'],
+            max_tokens=1200
+        )
+        return self._create_progress_analysis_prompt(session_summary, current_goals)
+    
     def _sanitize_assessment_data(self, assessment_data: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize assessment data for AI processing"""
         sanitized = {}
@@ -218,13 +317,15 @@ class AICoachingService:
     
     def _sanitize_profile_data(self, profile_data: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize profile data for AI processing"""
+        prefs = profile_data.get('coaching_preferences') or {}
+        ctx = profile_data.get('business_context') or {}
         return {
-            'professional_role': profile_data.get('coaching_preferences', {}).get('professional_role'),
-            'industry_sector': profile_data.get('coaching_preferences', {}).get('industry_sector'),
-            'experience_level': profile_data.get('coaching_preferences', {}).get('experience_level'),
-            'coaching_focus_areas': profile_data.get('coaching_preferences', {}).get('coaching_focus_areas', []),
-            'management_level': profile_data.get('business_context', {}).get('management_level'),
-            'company_size_range': profile_data.get('business_context', {}).get('company_size_range')
+            'professional_role': prefs.get('professional_role'),
+            'industry_sector': prefs.get('industry_sector'),
+            'experience_level': prefs.get('experience_level'),
+            'coaching_focus_areas': prefs.get('coaching_focus_areas', []),
+            'management_level': ctx.get('management_level'),
+            'company_size_range': ctx.get('company_size_range')
         }
     
     def _create_assessment_analysis_prompt(self, assessment_data: Dict[str, Any]) -> str:
@@ -363,16 +464,7 @@ Respond only with valid JSON.
             client = self._get_client()
             response = client.chat.completions.create(
                 model=self._model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert executive coach with 20+ years of experience in leadership development and professional coaching. You provide evidence-based, actionable insights and recommendations."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=[_SYSTEM_MSG, {"role": "user", "content": prompt}],
                 max_tokens=max_tokens or self._max_tokens,
                 temperature=self._temperature,
                 response_format={"type": "json_object"}
@@ -417,7 +509,16 @@ Respond only with valid JSON.
             return self._get_fallback_session_prep()
     
     def _summarize_sessions(self, sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Summarize session history for AI analysis"""
+        """
+        Summarize session history for AI analysis
+        
+        Totals, satisfaction and homework completion cover the full history.
+        Sessions arrive newest first (get_user_sessions orders by session_date
+        descending). For users with more than _SESSION_SUMMARY_THRESHOLD
+        sessions, topics and skills are drawn from the most recent
+        _SESSION_SUMMARY_WINDOW sessions only - recent sessions are the most
+        relevant for coaching recommendations and this bounds per-request work.
+        """
         if not sessions:
             return {
                 'total_sessions': 0,
@@ -430,19 +531,22 @@ Respond only with valid JSON.
         total_sessions = len(sessions)
         total_satisfaction = sum(s.get('satisfaction_score', 0) for s in sessions)
         avg_satisfaction = total_satisfaction / total_sessions if total_sessions > 0 else 0
+        homework_completed = sum(
+            1 for s in sessions if s.get('progress_metrics', {}).get('homework_completion')
+        )
         
-        # Aggregate topics and skills
+        # Aggregate topics and skills over a bounded window of recent sessions
+        if total_sessions > _SESSION_SUMMARY_THRESHOLD:
+            recent_sessions = sessions[:_SESSION_SUMMARY_WINDOW]
+        else:
+            recent_sessions = sessions
         all_topics = []
         all_skills = []
-        homework_completed = 0
         
-        for session in sessions:
+        for session in recent_sessions:
             outcomes = session.get('outcomes', {})
             all_topics.extend(outcomes.get('topics_covered', []))
             all_skills.extend(outcomes.get('skills_practiced', []))
-            
-            if session.get('progress_metrics', {}).get('homework_completion'):
-                homework_completed += 1
         
         # Get unique topics and skills
         unique_topics = list(set(all_topics))
@@ -9,59 +9,187 @@ This module provides secure Firebase integration with:
 """
 
 import os
+import copy
 import json
-from typing import Dict, List, Optional, Any, Union
-from datetime import datetime, timezone
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Any, Union, Tuple
+from datetime import datetime, timedelta, timezone
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 from google.cloud.firestore import Client, Query
-from flask import current_app
+from cachetools import TTLCache
 
 from app.utils.security import data_encryption
 from app.utils.anonymization import anonymization_service
 
+logger = logging.getLogger(__name__)
+
+
+def _build_env_credentials() -> Optional[Dict[str, Any]]:
+    """Build service account credentials from environment variables, if configured"""
+    project_id = os.environ.get('FIREBASE_PROJECT_ID')
+    if not project_id:
+        return None
+    return {
+        "type": "service_account",
+        "project_id": project_id,
+        "private_key_id": os.environ.get('FIREBASE_PRIVATE_KEY_ID'),
+        "private_key": os.environ.get('FIREBASE_PRIVATE_KEY', '').replace('\\n', '\n'),
+        "client_email": os.environ.get('FIREBASE_CLIENT_EMAIL'),
+        "client_id": os.environ.get('FIREBASE_CLIENT_ID'),
+        "auth_uri": os.environ.get('FIREBASE_AUTH_URI'),
+        "token_uri": os.environ.get('FIREBASE_TOKEN_URI'),
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{os.environ.get('FIREBASE_CLIENT_EMAIL')}"
+    }
+
+
+# Environment-derived credentials, resolved once at import
+_ENV_CREDENTIALS = _build_env_credentials()
+
+# Encrypted fields per collection
+_USER_SENSITIVE = ('coaching_preferences', 'business_context')
+_ASSESSMENT_SENSITIVE = ('responses',)
+_PLAN_SENSITIVE = ('detailed_plan', 'personalized_recommendations')
+_SESSION_SENSITIVE = ('outcomes',)
+
+# Dedicated pool for per-document decryption so crypto can use every core
+_CRYPTO_POOL = ThreadPoolExecutor(max_workers=8)
+
+# Marketplace catalog cache: projected public documents keyed by filter set
+_CATALOG_CACHE_MAXSIZE = 128
+_CATALOG_CACHE_TTL_SECONDS = 300
+
+# Public fields projected server-side for marketplace listings
+_COACH_PUBLIC_FIELDS = [
+    'name', 'title', 'specialties', 'rating', 'reviews_count', 'price_per_session',
+    'available_durations', 'image_url', 'description', 'category', 'availability'
+]
+_COURSE_PUBLIC_FIELDS = [
+    'name', 'instructor', 'description', 'modules', 'duration_hours', 'price',
+    'rating', 'reviews_count', 'category', 'level', 'image_url'
+]
+
+# Attempts per write before delete_user_data gives up on it
+_BULK_WRITE_MAX_ATTEMPTS = 5
+
+# Decrypted document cache settings
+_CACHE_MAXSIZE = 10_000
+_CACHE_TTL_SECONDS = 60
+
 
 class FirebaseService:
+    def __init__(self):
+        self._app = None
+        self._db = None
+        # Firebase init runs exactly once; _mock_mode is cached after the attempt
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._mock_mode = True
+        # Decrypted documents keyed by (collection, doc_id); TTLCache is not
+        # thread-safe so all access goes through _cache_lock
+        self._cache = TTLCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL_SECONDS)
+        self._cache_lock = threading.Lock()
+        # Per-key locks so concurrent misses decrypt a document only once
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        # Marketplace query results, shared across requests; callers must not
+        # mutate the cached dicts
+        self._coaches_cache = TTLCache(maxsize=_CATALOG_CACHE_MAXSIZE, ttl=_CATALOG_CACHE_TTL_SECONDS)
+        self._courses_cache = TTLCache(maxsize=_CATALOG_CACHE_MAXSIZE, ttl=_CATALOG_CACHE_TTL_SECONDS)
+        self._catalog_lock = threading.Lock()
+    
+    def _cached_get(self, collection: str, doc_id: str, loader) -> Optional[Dict[str, Any]]:
+        """Serve a decrypted document from cache, falling through to Firestore on miss"""
+        key = (collection, doc_id)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with self._cache_lock:
+                cached = self._cache.get(key)
+            if cached is None:
+                cached = loader()
+                with self._cache_lock:
+                    if cached is not None:
+                        self._cache[key] = cached
+                    self._key_locks.pop(key, None)
+        
+        # Deep copies so callers never share (or mutate) nested cached values
+        return copy.deepcopy(cached) if cached is not None else None
+    
+    @property
+    def _read_log_level(self) -> int:
+        """Level for read-path failures: expected noise in mock mode, real errors otherwise"""
+        return logging.DEBUG if self._mock_mode else logging.WARNING
+    
+    def _invalidate(self, collection: str, doc_id: str):
+        """Drop a single cached document"""
+        with self._cache_lock:
+            self._cache.pop((collection, doc_id), None)
+    
+    def invalidate(self, user_id: str):
+        """Drop any cached assessments/plans of a user"""
+        with self._cache_lock:
+            stale_keys = [
+                key for key, value in self._cache.items()
+                if value.get('user_id') == user_id
+            ]
+            for key in stale_keys:
+                self._cache.pop(key, None)
+    
+    def clear_catalog_cache(self):
+        """Drop cached coach/course listings (call after catalog writes)"""
+        with self._catalog_lock:
+            self._coaches_cache.clear()
+            self._courses_cache.clear()
+    
     def create_user_profile_sync(self, user_data: Dict[str, Any]) -> str:
         """Synchronous wrapper for create_user_profile"""
-        import asyncio
-        return asyncio.run(self.create_user_profile(user_data))
+        return self._create_user_profile_impl(user_data)
     
     def update_user_profile_sync(self, user_id: str, updates: Dict[str, Any]) -> bool:
         """Synchronous wrapper for update_user_profile"""
-        if not self._db:
+        self._initialize_firebase()
+        if self._mock_mode:
             # Mock update - just return success
-            print(f"Mock update user profile {user_id}: {updates}")
+            logger.debug("Mock update user profile %s: %s", user_id, updates)
             return True
-        import asyncio
-        return asyncio.run(self.update_user_profile(user_id, updates))
+        return self._update_user_profile_impl(user_id, updates)
     
     def save_assessment_sync(self, assessment_data: Dict[str, Any], user_id: str) -> str:
         """Synchronous wrapper for save_assessment"""
-        if not self._db:
+        self._initialize_firebase()
+        if self._mock_mode:
             # Mock save - return a fake assessment ID
             assessment_id = f"assessment_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{user_id[:8]}"
-            print(f"Mock save assessment {assessment_id} for user {user_id}")
+            logger.debug("Mock save assessment %s for user %s", assessment_id, user_id)
             return assessment_id
-        import asyncio
-        return asyncio.run(self.save_assessment(assessment_data, user_id))
+        return self._save_assessment_impl(assessment_data, user_id)
     
     def save_coaching_plan_sync(self, plan_data: Dict[str, Any]) -> str:
         """Synchronous wrapper for save_coaching_plan"""
-        if not self._db:
+        self._initialize_firebase()
+        if self._mock_mode:
             # Mock save - return a fake plan ID
             plan_id = f"plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{plan_data['user_id'][:8]}"
-            print(f"Mock save coaching plan {plan_id} for user {plan_data['user_id']}")
+            logger.debug("Mock save coaching plan %s for user %s", plan_id, plan_data['user_id'])
             return plan_id
-        import asyncio
-        return asyncio.run(self.save_coaching_plan(plan_data))
+        return self._save_coaching_plan_impl(plan_data)
+    
     def get_user_profile_sync(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Synchronous wrapper for get_user_profile"""
-        if not self._db:
+        self._initialize_firebase()
+        if self._mock_mode:
             # Return mock data when Firebase is not available
             return self._get_mock_user_profile(user_id)
-        import asyncio
-        return asyncio.run(self.get_user_profile(user_id))
+        return self._get_user_profile_impl(user_id)
     
     def _get_mock_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Return mock user profile data for development"""
@@ -84,27 +212,20 @@ class FirebaseService:
             'subscription_tier': 'free',
             'profile_completion_percentage': 85
         }
-        try:
-            # Anonymize updates
-            if 'coaching_preferences' in updates or 'business_context' in updates:
-                sensitive_fields = ['coaching_preferences', 'business_context']
-                encrypted_updates = data_encryption.encrypt_dict(updates, sensitive_fields)
-            else:
-                encrypted_updates = updates
-            # Add update timestamp
-            encrypted_updates['last_updated'] = datetime.now(timezone.utc).isoformat()
-            self.db.collection('users').document(user_id).update(encrypted_updates)
-            return True
-        except Exception as e:
-            print(f"Failed to update user profile {user_id}: {e}")
-            return False
-        """Lazy initialization of Firestore client"""
-        if self._db is None:
-            self._initialize_firebase()
-        return self._db
     
     def _initialize_firebase(self):
-        """Initialize Firebase Admin SDK"""
+        """Initialize Firebase Admin SDK once (double-checked locking)"""
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._init_firebase_client()
+            self._mock_mode = self._db is None
+            self._initialized = True
+    
+    def _init_firebase_client(self):
+        """Create the Firestore client; leaves _db as None in mock mode"""
         try:
             # Check if Firebase is already initialized
             if firebase_admin._apps:
@@ -117,52 +238,39 @@ class FirebaseService:
                 if cred_path and os.path.exists(cred_path):
                     # Use service account file
                     cred = credentials.Certificate(cred_path)
+                elif _ENV_CREDENTIALS:
+                    # Use environment variables for credentials
+                    cred = credentials.Certificate(_ENV_CREDENTIALS)
                 else:
-                    # Try to use environment variables
-                    project_id = os.environ.get('FIREBASE_PROJECT_ID')
-                    
-                    if project_id:
-                        # Use environment variables for credentials
-                        cred_dict = {
-                            "type": "service_account",
-                            "project_id": project_id,
-                            "private_key_id": os.environ.get('FIREBASE_PRIVATE_KEY_ID'),
-                            "private_key": os.environ.get('FIREBASE_PRIVATE_KEY', '').replace('\\n', '\n'),
-                            "client_email": os.environ.get('FIREBASE_CLIENT_EMAIL'),
-                            "client_id": os.environ.get('FIREBASE_CLIENT_ID'),
-                            "auth_uri": os.environ.get('FIREBASE_AUTH_URI'),
-                            "token_uri": os.environ.get('FIREBASE_TOKEN_URI'),
-                            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                            "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{os.environ.get('FIREBASE_CLIENT_EMAIL')}"
-                        }
-                        cred = credentials.Certificate(cred_dict)
-                    else:
-                        # No Firebase credentials available - use mock mode
-                        print("No Firebase credentials found - using mock data mode")
-                        self._db = None
-                        return
+                    # No Firebase credentials available - use mock mode
+                    logger.info("No Firebase credentials found - using mock data mode")
+                    self._db = None
+                    return
                 
                 self._app = firebase_admin.initialize_app(cred)
             
             self._db = firestore.client()
-            print("Firebase initialized successfully")
+            logger.info("Firebase initialized successfully")
             
         except Exception as e:
-            print(f"Firebase initialization failed: {e} - using mock data mode")
+            logger.warning("Firebase initialization failed: %s - using mock data mode", e)
             self._db = None
     
     @property
     def db(self) -> Client:
         """Get Firestore client"""
-        if not self._db:
-            self._initialize_firebase()
-        if not self._db:
+        self._initialize_firebase()
+        if self._mock_mode:
             raise RuntimeError("Firebase not available - using mock data mode")
         return self._db
     
     # User Management (Anonymized)
     
     async def create_user_profile(self, user_data: Dict[str, Any]) -> str:
+        """Create anonymized user profile"""
+        return await asyncio.to_thread(self._create_user_profile_impl, user_data)
+    
+    def _create_user_profile_impl(self, user_data: Dict[str, Any]) -> str:
         """
         Create anonymized user profile
         
@@ -174,24 +282,34 @@ class FirebaseService:
             user_id = anonymized_profile['user_id']
             
             # Encrypt sensitive coaching data
-            sensitive_fields = ['coaching_preferences', 'business_context']
             encrypted_profile = data_encryption.encrypt_dict(
                 anonymized_profile, 
-                sensitive_fields
+                _USER_SENSITIVE,
+                inplace=True
             )
             
             # Store in Firestore
             self.db.collection('users').document(user_id).set(encrypted_profile)
             
-            print(f"Created anonymized user profile: {user_id}")
+            logger.debug("Created anonymized user profile: %s", user_id)
             return user_id
             
         except Exception as e:
-            print(f"User profile creation failed: {e}")
+            logger.error("User profile creation failed: %s", e)
             raise
     
     async def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile by anonymous ID"""
+        return await asyncio.to_thread(self._get_user_profile_impl, user_id)
+    
+    def _get_user_profile_impl(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get user profile by anonymous ID"""
+        # Not cached: profiles carry the password hash, and a per-process cache
+        # would keep accepting an old password in other workers after a change
+        return self._load_user_profile(user_id)
+    
+    def _load_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Read and decrypt a user profile from Firestore"""
         try:
             doc_ref = self.db.collection('users').document(user_id)
             doc = doc_ref.get()
@@ -202,25 +320,28 @@ class FirebaseService:
             encrypted_data = doc.to_dict()
             
             # Decrypt sensitive fields
-            sensitive_fields = ['coaching_preferences', 'business_context']
             decrypted_data = data_encryption.decrypt_dict(
                 encrypted_data,
-                sensitive_fields
+                _USER_SENSITIVE,
+                inplace=True
             )
             
             return decrypted_data
             
         except Exception as e:
-            print(f"Failed to get user profile {user_id}: {e}")
+            logger.log(self._read_log_level, "Failed to get user profile %s: %s", user_id, e)
             return None
     
     async def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> bool:
+        """Update user profile with anonymized data"""
+        return await asyncio.to_thread(self._update_user_profile_impl, user_id, updates)
+    
+    def _update_user_profile_impl(self, user_id: str, updates: Dict[str, Any]) -> bool:
         """Update user profile with anonymized data"""
         try:
             # Anonymize updates
             if 'coaching_preferences' in updates or 'business_context' in updates:
-                sensitive_fields = ['coaching_preferences', 'business_context']
-                encrypted_updates = data_encryption.encrypt_dict(updates, sensitive_fields)
+                encrypted_updates = data_encryption.encrypt_dict(updates, _USER_SENSITIVE)
             else:
                 encrypted_updates = updates
             
@@ -231,54 +352,91 @@ class FirebaseService:
             return True
             
         except Exception as e:
-            print(f"Failed to update user profile {user_id}: {e}")
+            logger.error("Failed to update user profile %s: %s", user_id, e)
             return False
     
     async def delete_user_data(self, user_id: str) -> bool:
         """GDPR-compliant user data deletion"""
         try:
-            batch = self.db.batch()
+            # Scan the three user-owned collections concurrently
+            assessments, plans, sessions = await asyncio.gather(
+                asyncio.to_thread(
+                    self.db.collection('assessments').where('user_id', '==', user_id).get
+                ),
+                asyncio.to_thread(
+                    self.db.collection('coaching_plans').where('user_id', '==', user_id).get
+                ),
+                asyncio.to_thread(
+                    self.db.collection('sessions').where('user_id', '==', user_id).get
+                )
+            )
+            
+            now_iso = datetime.now(timezone.utc).isoformat()
+            
+            # BulkWriter chunks and parallelizes writes, with no 500-op batch limit.
+            # It is not atomic and close() does not raise on failed writes, so
+            # record every write that exhausts its retries
+            bulk_writer = self.db.bulk_writer()
+            failures = []
+            
+            def on_write_error(error, writer) -> bool:
+                if error.attempts < _BULK_WRITE_MAX_ATTEMPTS:
+                    return True
+                failures.append(error)
+                return False
+            
+            bulk_writer.on_write_error(on_write_error)
             
             # Delete user profile
             user_ref = self.db.collection('users').document(user_id)
-            batch.delete(user_ref)
+            bulk_writer.delete(user_ref)
             
             # Delete assessments
-            assessments = self.db.collection('assessments').where('user_id', '==', user_id).get()
             for assessment in assessments:
-                batch.delete(assessment.reference)
+                bulk_writer.delete(assessment.reference)
             
             # Delete coaching plans
-            plans = self.db.collection('coaching_plans').where('user_id', '==', user_id).get()
             for plan in plans:
-                batch.delete(plan.reference)
+                bulk_writer.delete(plan.reference)
             
             # Delete sessions (but keep anonymized analytics)
-            sessions = self.db.collection('sessions').where('user_id', '==', user_id).get()
             for session in sessions:
                 # Anonymize session data instead of deleting for analytics
+                session_data = session.to_dict()
                 anonymized_session = {
                     'user_id': 'deleted_user',
-                    'deletion_date': datetime.now(timezone.utc).isoformat(),
-                    'session_type': session.to_dict().get('session_type'),
-                    'duration_minutes': session.to_dict().get('duration_minutes'),
-                    'satisfaction_score': session.to_dict().get('satisfaction_score')
+                    'deletion_date': now_iso,
+                    'session_type': session_data.get('session_type'),
+                    'duration_minutes': session_data.get('duration_minutes'),
+                    'satisfaction_score': session_data.get('satisfaction_score')
                 }
-                batch.set(session.reference, anonymized_session)
+                bulk_writer.set(session.reference, anonymized_session)
             
-            # Commit all changes
-            batch.commit()
+            # Flush all pending writes
+            await asyncio.to_thread(bulk_writer.close)
+            self.invalidate(user_id)
             
-            print(f"Deleted user data for {user_id}")
+            if failures:
+                logger.error(
+                    "Partially deleted user data %s: %d writes failed (first: %s %s)",
+                    user_id, len(failures), failures[0].code, failures[0].message
+                )
+                return False
+            
+            logger.info("Deleted user data for %s", user_id)
             return True
             
         except Exception as e:
-            print(f"Failed to delete user data {user_id}: {e}")
+            logger.error("Failed to delete user data %s: %s", user_id, e)
             return False
     
     # Assessment Management
     
     async def save_assessment(self, assessment_data: Dict[str, Any], user_id: str) -> str:
+        """Save anonymized assessment data"""
+        return await asyncio.to_thread(self._save_assessment_impl, assessment_data, user_id)
+    
+    def _save_assessment_impl(self, assessment_data: Dict[str, Any], user_id: str) -> str:
         """Save anonymized assessment data"""
         try:
             # Anonymize assessment data
@@ -289,30 +447,45 @@ class FirebaseService:
             assessment_id = anonymized_assessment['assessment_id']
             
             # Encrypt sensitive responses
-            sensitive_fields = ['responses']
             encrypted_assessment = data_encryption.encrypt_dict(
                 anonymized_assessment,
-                sensitive_fields
+                _ASSESSMENT_SENSITIVE,
+                inplace=True
             )
             
-            # Store in Firestore
-            self.db.collection('assessments').document(assessment_id).set(encrypted_assessment)
-            
-            # Update user profile with assessment completion
-            await self.update_user_profile(user_id, {
+            # Store assessment and mark completion on the profile in one atomic commit
+            # (the profile fields are non-sensitive, so nothing to encrypt)
+            now_iso = datetime.now(timezone.utc).isoformat()
+            batch = self.db.batch()
+            batch.set(
+                self.db.collection('assessments').document(assessment_id),
+                encrypted_assessment
+            )
+            # update() fails the whole commit if the profile is missing, so no
+            # stub user doc is created for a deleted account
+            batch.update(self.db.collection('users').document(user_id), {
                 'assessment_completed': True,
                 'latest_assessment_id': assessment_id,
-                'assessment_completion_date': datetime.now(timezone.utc).isoformat()
+                'assessment_completion_date': now_iso,
+                'last_updated': now_iso
             })
+            batch.commit()
+            self._invalidate('assessments', assessment_id)
             
             return assessment_id
             
         except Exception as e:
-            print(f"Failed to save assessment: {e}")
+            logger.error("Failed to save assessment: %s", e)
             raise
     
     async def get_assessment(self, assessment_id: str) -> Optional[Dict[str, Any]]:
         """Get assessment by ID"""
+        return await asyncio.to_thread(
+            self._cached_get, 'assessments', assessment_id, lambda: self._load_assessment(assessment_id)
+        )
+    
+    def _load_assessment(self, assessment_id: str) -> Optional[Dict[str, Any]]:
+        """Read and decrypt an assessment from Firestore"""
         try:
             doc_ref = self.db.collection('assessments').document(assessment_id)
             doc = doc_ref.get()
@@ -323,16 +496,16 @@ class FirebaseService:
             encrypted_data = doc.to_dict()
             
             # Decrypt sensitive fields
-            sensitive_fields = ['responses']
             decrypted_data = data_encryption.decrypt_dict(
                 encrypted_data,
-                sensitive_fields
+                _ASSESSMENT_SENSITIVE,
+                inplace=True
             )
             
             return decrypted_data
             
         except Exception as e:
-            print(f"Failed to get assessment {assessment_id}: {e}")
+            logger.log(self._read_log_level, "Failed to get assessment %s: %s", assessment_id, e)
             return None
     
     async def get_user_assessments(self, user_id: str) -> List[Dict[str, Any]]:
@@ -342,47 +515,58 @@ class FirebaseService:
             query = assessments_ref.where('user_id', '==', user_id).order_by('completed_at', direction=firestore.Query.DESCENDING)
             docs = query.get()
             
-            assessments = []
-            for doc in docs:
-                encrypted_data = doc.to_dict()
-                # Decrypt for analysis
-                sensitive_fields = ['responses']
-                decrypted_data = data_encryption.decrypt_dict(
-                    encrypted_data,
-                    sensitive_fields
-                )
-                assessments.append(decrypted_data)
-            
-            return assessments
+            # Decrypt for analysis
+            return await self._decrypt_documents(docs, _ASSESSMENT_SENSITIVE)
             
         except Exception as e:
-            print(f"Failed to get assessments for user {user_id}: {e}")
+            logger.log(self._read_log_level, "Failed to get assessments for user %s: %s", user_id, e)
             return []
     
+    async def _decrypt_documents(self, docs, sensitive_fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+        """Decrypt query results in parallel on the crypto pool"""
+        loop = asyncio.get_running_loop()
+        # to_dict() returns a fresh dict per document, so decrypt it in place
+        decrypt = partial(data_encryption.decrypt_dict, inplace=True)
+        return list(await asyncio.gather(*(
+            loop.run_in_executor(_CRYPTO_POOL, decrypt, doc.to_dict(), sensitive_fields)
+            for doc in docs
+        )))
+    
     # Coaching Plans Management
     
     async def save_coaching_plan(self, plan_data: Dict[str, Any]) -> str:
+        """Save AI-generated coaching plan"""
+        return await asyncio.to_thread(self._save_coaching_plan_impl, plan_data)
+    
+    def _save_coaching_plan_impl(self, plan_data: Dict[str, Any]) -> str:
         """Save AI-generated coaching plan"""
         try:
-            plan_id = f"plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{plan_data['user_id'][:8]}"
+            now = datetime.now(timezone.utc)
+            plan_id = f"plan_{now.astimezone().strftime('%Y%m%d_%H%M%S')}_{plan_data['user_id'][:8]}"
             
             # Encrypt sensitive plan data
-            sensitive_fields = ['detailed_plan', 'personalized_recommendations']
-            encrypted_plan = data_encryption.encrypt_dict(plan_data, sensitive_fields)
+            encrypted_plan = data_encryption.encrypt_dict(plan_data, _PLAN_SENSITIVE)
             
             encrypted_plan['plan_id'] = plan_id
-            encrypted_plan['created_at'] = datetime.now(timezone.utc).isoformat()
+            encrypted_plan['created_at'] = now.isoformat()
             
             self.db.collection('coaching_plans').document(plan_id).set(encrypted_plan)
+            self._invalidate('coaching_plans', plan_id)
             
             return plan_id
             
         except Exception as e:
-            print(f"Failed to save coaching plan: {e}")
+            logger.error("Failed to save coaching plan: %s", e)
             raise
     
     async def get_coaching_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
         """Get coaching plan by ID"""
+        return await asyncio.to_thread(
+            self._cached_get, 'coaching_plans', plan_id, lambda: self._load_coaching_plan(plan_id)
+        )
+    
+    def _load_coaching_plan(self, plan_id: str) -> Optional[Dict[str, Any]]:
+        """Read and decrypt a coaching plan from Firestore"""
         try:
             doc_ref = self.db.collection('coaching_plans').document(plan_id)
             doc = doc_ref.get()
@@ -393,16 +577,16 @@ class FirebaseService:
             encrypted_data = doc.to_dict()
             
             # Decrypt sensitive fields
-            sensitive_fields = ['detailed_plan', 'personalized_recommendations']
             decrypted_data = data_encryption.decrypt_dict(
                 encrypted_data,
-                sensitive_fields
+                _PLAN_SENSITIVE,
+                inplace=True
             )
             
             return decrypted_data
             
         except Exception as e:
-            print(f"Failed to get coaching plan {plan_id}: {e}")
+            logger.log(self._read_log_level, "Failed to get coaching plan %s: %s", plan_id, e)
             return None
     
     async def get_user_coaching_plans(self, user_id: str) -> List[Dict[str, Any]]:
@@ -412,21 +596,11 @@ class FirebaseService:
             query = plans_ref.where('user_id', '==', user_id).order_by('created_at', direction=firestore.Query.DESCENDING)
             docs = query.get()
             
-            plans = []
-            for doc in docs:
-                encrypted_data = doc.to_dict()
-                # Decrypt for user access
-                sensitive_fields = ['detailed_plan', 'personalized_recommendations']
-                decrypted_data = data_encryption.decrypt_dict(
-                    encrypted_data,
-                    sensitive_fields
-                )
-                plans.append(decrypted_data)
-            
-            return plans
+            # Decrypt for user access
+            return await self._decrypt_documents(docs, _PLAN_SENSITIVE)
             
         except Exception as e:
-            print(f"Failed to get coaching plans for user {user_id}: {e}")
+            logger.log(self._read_log_level, "Failed to get coaching plans for user %s: %s", user_id, e)
             return []
     
     # Session Management
@@ -439,21 +613,27 @@ class FirebaseService:
             session_id = anonymized_session['session_id']
             
             # Encrypt session outcomes
-            sensitive_fields = ['outcomes']
             encrypted_session = data_encryption.encrypt_dict(
                 anonymized_session,
-                sensitive_fields
+                _SESSION_SENSITIVE,
+                inplace=True
             )
             
-            self.db.collection('sessions').document(session_id).set(encrypted_session)
-            
-            # Update user session count
-            await self.increment_user_sessions(session_data['user_id'])
+            # Store session and bump the user's session count in one commit
+            user_id = session_data['user_id']
+            batch = self.db.batch()
+            batch.set(self.db.collection('sessions').document(session_id), encrypted_session)
+            # update() fails the whole commit if the profile is missing
+            batch.update(self.db.collection('users').document(user_id), {
+                'total_sessions_count': firestore.Increment(1),
+                'last_session_date': datetime.now(timezone.utc).isoformat()
+            })
+            batch.commit()
             
             return session_id
             
         except Exception as e:
-            print(f"Failed to save session: {e}")
+            logger.error("Failed to save session: %s", e)
             raise
     
     async def get_user_sessions(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
@@ -463,25 +643,15 @@ class FirebaseService:
             query = sessions_ref.where('user_id', '==', user_id).order_by('session_date', direction=firestore.Query.DESCENDING).limit(limit)
             docs = query.get()
             
-            sessions = []
-            for doc in docs:
-                encrypted_data = doc.to_dict()
-                # Decrypt for user access
-                sensitive_fields = ['outcomes']
-                decrypted_data = data_encryption.decrypt_dict(
-                    encrypted_data,
-                    sensitive_fields
-                )
-                sessions.append(decrypted_data)
-            
-            return sessions
+            # Decrypt for user access
+            return await self._decrypt_documents(docs, _SESSION_SENSITIVE)
             
         except Exception as e:
-            print(f"Failed to get sessions for user {user_id}: {e}")
+            logger.log(self._read_log_level, "Failed to get sessions for user %s: %s", user_id, e)
             return []
     
     async def increment_user_sessions(self, user_id: str):
-        """Increment user session count for analytics"""
+        """Increment user session count for analytics (save_session does this in its batch)"""
         try:
             user_ref = self.db.collection('users').document(user_id)
             user_ref.update({
@@ -489,21 +659,20 @@ class FirebaseService:
                 'last_session_date': datetime.now(timezone.utc).isoformat()
             })
         except Exception as e:
-            print(f"Failed to update session count for {user_id}: {e}")
+            logger.error("Failed to update session count for %s: %s", user_id, e)
     
     # Analytics (Aggregated/Anonymous)
     
     async def get_platform_analytics(self) -> Dict[str, Any]:
         """Get anonymized platform analytics"""
         try:
-            # Total users (approximate)
-            users_count = len(list(self.db.collection('users').select([]).get()))
-            
-            # Total sessions
-            sessions_count = len(list(self.db.collection('sessions').select([]).get()))
-            
-            # User engagement metrics
-            active_users_30d = self._count_active_users(30)
+            # Total users, total sessions and 30-day active users are independent
+            # server-side count aggregations, so issue them concurrently
+            users_count, sessions_count, active_users_30d = await asyncio.gather(
+                asyncio.to_thread(self._count_collection, 'users'),
+                asyncio.to_thread(self._count_collection, 'sessions'),
+                asyncio.to_thread(self._count_active_users, 30)
+            )
             
             return {
                 'total_users': users_count,
@@ -514,26 +683,36 @@ class FirebaseService:
             }
             
         except Exception as e:
-            print(f"Failed to get platform analytics: {e}")
+            logger.log(self._read_log_level, "Failed to get platform analytics: %s", e)
             return {}
     
+    def _count_collection(self, collection: str) -> int:
+        """Count documents in a collection with a server-side aggregation"""
+        return self.db.collection(collection).count().get()[0][0].value
+    
     def _count_active_users(self, days: int) -> int:
         """Count users active in the last N days"""
         try:
-            cutoff_date = datetime.now(timezone.utc).replace(day=datetime.now().day - days)
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
             cutoff_iso = cutoff_date.isoformat()
             
-            active_users = self.db.collection('users').where('last_active', '>=', cutoff_iso).get()
-            return len(list(active_users))
+            active_users = self.db.collection('users').where('last_active', '>=', cutoff_iso)
+            return active_users.count().get()[0][0].value
             
         except Exception as e:
-            print(f"Failed to count active users: {e}")
+            logger.log(self._read_log_level, "Failed to count active users: %s", e)
             return 0
     
     # Marketplace Data (Public/Static)
     
-    async def get_coaches(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Get available coaches (public data)"""
+    async def get_coaches(self, filters: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], ...]:
+        """Get available coaches (public data), cached as a tuple of dicts"""
+        cache_key = frozenset((filters or {}).items())
+        with self._catalog_lock:
+            cached = self._coaches_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             coaches_ref = self.db.collection('coaches')
             
@@ -545,9 +724,9 @@ class FirebaseService:
                 if 'available' in filters:
                     query = query.where('available', '==', filters['available'])
                     
-                docs = query.get()
+                docs = query.select(_COACH_PUBLIC_FIELDS).get()
             else:
-                docs = coaches_ref.get()
+                docs = coaches_ref.select(_COACH_PUBLIC_FIELDS).get()
             
             coaches = []
             for doc in docs:
@@ -569,14 +748,23 @@ class FirebaseService:
                 }
                 coaches.append(public_coach_data)
             
+            coaches = tuple(coaches)
+            with self._catalog_lock:
+                self._coaches_cache[cache_key] = coaches
             return coaches
             
         except Exception as e:
-            print(f"Failed to get coaches: {e}")
-            return []
+            logger.log(self._read_log_level, "Failed to get coaches: %s", e)
+            return ()
     
-    async def get_courses(self, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Get available courses (public data)"""
+    async def get_courses(self, filters: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], ...]:
+        """Get available courses (public data), cached as a tuple of dicts"""
+        cache_key = frozenset((filters or {}).items())
+        with self._catalog_lock:
+            cached = self._courses_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             courses_ref = self.db.collection('courses')
             
@@ -584,9 +772,9 @@ class FirebaseService:
                 query = courses_ref
                 if 'category' in filters:
                     query = query.where('category', '==', filters['category'])
-                docs = query.get()
+                docs = query.select(_COURSE_PUBLIC_FIELDS).get()
             else:
-                docs = courses_ref.get()
+                docs = courses_ref.select(_COURSE_PUBLIC_FIELDS).get()
             
             courses = []
             for doc in docs:
@@ -607,11 +795,14 @@ class FirebaseService:
                 }
                 courses.append(public_course_data)
             
+            courses = tuple(courses)
+            with self._catalog_lock:
+                self._courses_cache[cache_key] = courses
             return courses
             
         except Exception as e:
-            current_app.logger.error(f"Failed to get courses: {e}")
-            return []
+            logger.log(self._read_log_level, "Failed to get courses: %s", e)
+            return ()
 
 
 # Global service instance
@@ -5,105 +5,196 @@ This module provides a unified interface for all third-party tool integrations,
 acting as an abstraction layer to simplify workflow automation.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple
+
+import aiohttp
+
+# Shared connection pool sizing for all third-party tool calls
+_POOL_LIMIT = 100
+_DNS_CACHE_TTL_SECONDS = 300
+
+# Session opened by ToolIntegrationManager.connect() for the current task
+# (and the tasks it gathers)
+_current_session: ContextVar[Optional[aiohttp.ClientSession]] = ContextVar(
+    'tool_http_session', default=None
+)
+
+
+class BaseAdapter:
+    """Common HTTP plumbing for tool adapters"""
+
+    async def _post(self, url: str, data: dict) -> dict:
+        session = _current_session.get()
+        if session is None:
+            raise RuntimeError("Tool calls must run inside ToolIntegrationManager.connect()")
+        async with session.post(url, json=data) as response:
+            return await response.json()
+
+
 # Placeholder adapters for each of the 14 tools
 
-class VocableAdapter:
-    def execute(self, data):
+class VocableAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Vocable.ai integration
         return {"status": "success", "tool": "vocable"}
 
-class MeetnAdapter:
-    def execute(self, data):
+class MeetnAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Meetn.com integration
         return {"status": "success", "tool": "meetn"}
 
-class SendFoxAdapter:
-    def execute(self, data):
+class SendFoxAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement SendFox integration
         return {"status": "success", "tool": "sendfox"}
 
-class ZeroWorkAdapter:
-    def execute(self, data):
+class ZeroWorkAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement ZeroWork.io integration
         return {"status": "success", "tool": "zerowork"}
 
-class DatabarAdapter:
-    def execute(self, data):
+class DatabarAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Databar.ai integration
         return {"status": "success", "tool": "databar"}
 
-class ProspAdapter:
-    def execute(self, data):
+class ProspAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Prosp.ai integration
         return {"status": "success", "tool": "prosp"}
 
-class LazyLeadzAdapter:
-    def execute(self, data):
+class LazyLeadzAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement LazyLeadz.com integration
         return {"status": "success", "tool": "lazyleadz"}
 
-class OnlyPromptsAdapter:
-    def execute(self, data):
+class OnlyPromptsAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement OnlyPrompts.net integration
         return {"status": "success", "tool": "onlyprompts"}
 
-class SocLeadsAdapter:
-    def execute(self, data):
+class SocLeadsAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement SocLeads.com integration
         return {"status": "success", "tool": "socleads"}
 
-class BHumanAdapter:
-    def execute(self, data):
+class BHumanAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement BHuman.ai integration
         return {"status": "success", "tool": "bhuman"}
 
-class PickaxeAdapter:
-    def execute(self, data):
+class PickaxeAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Pickaxe Project integration
         return {"status": "success", "tool": "pickaxe"}
 
-class KingSumoAdapter:
-    def execute(self, data):
+class KingSumoAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement KingSumo integration
         return {"status": "success", "tool": "kingsumo"}
 
-class UnifireAdapter:
-    def execute(self, data):
+class UnifireAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Unifire.ai integration
         return {"status": "success", "tool": "unifire"}
 
-class AfforaiAdapter:
-    def execute(self, data):
+class AfforaiAdapter(BaseAdapter):
+    async def execute(self, data):
         # TODO: Implement Afforai integration
         return {"status": "success", "tool": "afforai"}
 
 
+class Tool(IntEnum):
+    """Fixed index of each adapter in the manager's dispatch tuple"""
+    VOCABLE = 0
+    MEETN = 1
+    SENDFOX = 2
+    ZEROWORK = 3
+    DATABAR = 4
+    PROSP = 5
+    LAZYLEADZ = 6
+    ONLYPROMPTS = 7
+    SOCLEADS = 8
+    BHUMAN = 9
+    PICKAXE = 10
+    KINGSUMO = 11
+    UNIFIRE = 12
+    AFFORAI = 13
+
+
 class ToolIntegrationManager:
     """
     Manages and dispatches tasks to the appropriate tool adapters.
     """
     def __init__(self):
-        self.adapters = {
-            'vocable': VocableAdapter(),
-            'meetn': MeetnAdapter(),
-            'sendfox': SendFoxAdapter(),
-            'zerowork': ZeroWorkAdapter(),
-            'databar': DatabarAdapter(),
-            'prosp': ProspAdapter(),
-            'lazyleadz': LazyLeadzAdapter(),
-            'onlyprompts': OnlyPromptsAdapter(),
-            'socleads': SocLeadsAdapter(),
-            'bhuman': BHumanAdapter(),
-            'pickaxe': PickaxeAdapter(),
-            'kingsumo': KingSumoAdapter(),
-            'unifire': UnifireAdapter(),
-            'afforai': AfforaiAdapter(),
+        # Adapters ordered by Tool, so workflows index them by enum member
+        self._adapter_tuple = (
+            VocableAdapter(),
+            MeetnAdapter(),
+            SendFoxAdapter(),
+            ZeroWorkAdapter(),
+            DatabarAdapter(),
+            ProspAdapter(),
+            LazyLeadzAdapter(),
+            OnlyPromptsAdapter(),
+            SocLeadsAdapter(),
+            BHumanAdapter(),
+            PickaxeAdapter(),
+            KingSumoAdapter(),
+            UnifireAdapter(),
+            AfforaiAdapter(),
+        )
+        self.adapters: Dict[str, BaseAdapter] = {
+            tool.name.lower(): self._adapter_tuple[tool] for tool in Tool
         }
+        # Multi-tool workflows: workflow name -> tools run concurrently
+        self.workflows: Dict[str, Tuple[Tool, ...]] = {}
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        Open a pooled HTTP session for the tool calls made inside the block
+
+        Keep-alive connections are reused across calls in the block, so
+        repeat requests to a tool skip the TCP + TLS handshake. The session
+        is closed on exit, before the caller's event loop shuts down; nested
+        blocks reuse the outer session.
+        """
+        session = _current_session.get()
+        if session is not None:
+            yield session
+            return
+        connector = aiohttp.TCPConnector(
+            limit=_POOL_LIMIT,
+            ttl_dns_cache=_DNS_CACHE_TTL_SECONDS
+        )
+        async with aiohttp.ClientSession(connector=connector) as session:
+            token = _current_session.set(session)
+            try:
+                yield session
+            finally:
+                _current_session.reset(token)
+
+    def register_workflow(self, workflow_name: str, tools: Sequence[str]):
+        """Register a workflow that fans out to several tools"""
+        unknown = [tool for tool in tools if tool not in self.adapters]
+        if unknown:
+            raise ValueError(f"Unknown tools for workflow '{workflow_name}': {unknown}")
+        self.workflows[workflow_name] = tuple(Tool[tool.upper()] for tool in tools)
 
     async def execute_workflow(self, workflow_name: str, data: dict):
         """
         Executes a predefined workflow by calling the appropriate tool adapters.
 
+        Single-tool workflows dispatch directly; multi-tool workflows run their
+        adapters concurrently so latency is the slowest tool, not the sum.
+        Wrap several calls in ``async with manager.connect()`` to share one
+        connection pool between them.
+
         Args:
             workflow_name: The name of the workflow to execute.
             data: The data to pass to the workflow.
@@ -111,12 +202,16 @@ class ToolIntegrationManager:
         Returns:
             A dictionary with the results of the workflow execution.
         """
-        # For now, this is a simple dispatch. This will be expanded to handle
-        # complex, multi-step workflows.
-        if workflow_name in self.adapters:
-            return self.adapters[workflow_name].execute(data)
-        else:
+        adapter = self.adapters.get(workflow_name)
+        tools = None if adapter is not None else self.workflows.get(workflow_name)
+        if adapter is None and tools is None:
             raise ValueError(f"Workflow '{workflow_name}' not found.")
 
+        async with self.connect():
+            if adapter is not None:
+                return await adapter.execute(data)
+            results = await asyncio.gather(*(self._adapter_tuple[tool].execute(data) for tool in tools))
+        return {tool.name.lower(): result for tool, result in zip(tools, results)}
+
 # Global instance
 tool_integration_manager = ToolIntegrationManager()
@@ -5,14 +5,123 @@ This module provides advanced anonymization capabilities to ensure
 maximum user privacy while maintaining coaching effectiveness.
 """
 
+import os
+import re
 import uuid
+import bisect
 import hashlib
 import secrets
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime, timezone
 from flask import current_app
 
 
+# Keyword rules for the generalizing classifiers, in priority order:
+# the first rule with any matching term wins
+_ROLE_RULES = (
+    (('ceo', 'chief executive', 'president'), 'c_level_executive'),
+    (('cto', 'chief technology', 'vp engineering'), 'technical_executive'),
+    (('cfo', 'chief financial'), 'financial_executive'),
+    (('manager', 'director', 'head of'), 'management_role'),
+    (('senior', 'lead', 'principal'), 'senior_individual_contributor'),
+)
+
+_INDUSTRY_RULES = (
+    (('tech', 'software', 'it', 'computer'), 'technology'),
+    (('finance', 'bank', 'investment'), 'financial_services'),
+    (('health', 'medical', 'pharma'), 'healthcare'),
+    (('retail', 'ecommerce', 'commerce'), 'retail_commerce'),
+    (('consulting', 'advisory'), 'professional_services'),
+)
+
+_CHALLENGE_RULES = (
+    (('team', 'people', 'management'), 'team_management'),
+    (('communication', 'speaking', 'presentation'), 'communication_skills'),
+    (('strategy', 'planning', 'vision'), 'strategic_thinking'),
+    (('time', 'productivity', 'efficiency'), 'time_management'),
+    (('decision', 'choice', 'judgment'), 'decision_making'),
+)
+
+_COMPANY_SIZE_RULES = (
+    (('startup', '1-10'), 'startup_small'),
+    (('11-50', 'small'), 'small'),
+    (('51-200', 'medium'), 'medium'),
+    (('201-1000', 'large'), 'large'),
+)
+
+# Keyword -> suggested focus area, in suggestion order
+_FOCUS_RULES = (
+    ('leadership', 'leadership_development'),
+    ('communication', 'communication_enhancement'),
+    ('strategy', 'strategic_thinking'),
+    ('time', 'productivity_optimization'),
+)
+
+# Numeric range buckets: company and team sizes are inclusive upper bounds
+# (bisect_left), years in role are exclusive upper bounds (bisect_right)
+_COMPANY_BOUNDS = (10, 50, 200, 1000)
+_COMPANY_LABELS = ('startup_small', 'small', 'medium', 'large', 'enterprise')
+_TEAM_BOUNDS = (2, 5, 15)
+_TEAM_LABELS = ('individual', 'small_team', 'medium_team', 'large_team')
+_EXPERIENCE_BOUNDS = (2, 5, 10)
+_EXPERIENCE_LABELS = ('junior', 'mid_level', 'senior', 'expert')
+
+
+def _classify_company_size(size_lower: str) -> str:
+    """Map a lowercased company size description to a range label"""
+    return next(
+        (label for terms, label in _COMPANY_SIZE_RULES
+         if any(term in size_lower for term in terms)),
+        'enterprise'
+    )
+
+
+# Exact-value fast path for the company size terms most clients submit
+_SIZE_MAP = {
+    term: _classify_company_size(term)
+    for terms, _ in _COMPANY_SIZE_RULES
+    for term in terms
+}
+
+
+def _compile_rules(rules):
+    """
+    Compile a keyword rules table into a single-pass matcher
+    
+    The zero-width lookahead reports a term at every offset, so overlapping
+    terms are not swallowed; alternatives are listed in rule order, so each
+    offset yields its highest-priority term.
+    """
+    priorities = {}
+    for priority, (terms, _) in enumerate(rules):
+        for term in terms:
+            priorities.setdefault(term, priority)
+    pattern = re.compile(
+        '(?=(' + '|'.join(re.escape(term) for term in priorities) + '))'
+    )
+    return pattern, priorities
+
+
+def _match_rule(matcher, text: str) -> int:
+    """Return the index of the highest-priority rule matching text, or -1"""
+    pattern, priorities = matcher
+    best = -1
+    for match in pattern.finditer(text):
+        priority = priorities[match.group(1)]
+        if best < 0 or priority < best:
+            best = priority
+            if not best:
+                break
+    return best
+
+
+_ROLE_MATCHER = _compile_rules(_ROLE_RULES)
+_INDUSTRY_MATCHER = _compile_rules(_INDUSTRY_RULES)
+_CHALLENGE_MATCHER = _compile_rules(_CHALLENGE_RULES)
+_CHALLENGE_LABELS = tuple(label for _, label in _CHALLENGE_RULES) + ('other_professional_challenge',)
+
+
 class AnonymizationService:
     """
     Service for anonymizing user data while preserving coaching functionality
@@ -26,6 +135,28 @@ class AnonymizationService:
     
     def __init__(self):
         self._salt = None
+        self._salt_bytes = None
+        self._uuid_pool = deque()
+        # A pool filled before a (gunicorn preload) fork would hand the same
+        # IDs to every worker
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._uuid_pool.clear)
+    
+    def _refill_uuid_pool(self, n: int = 256):
+        """Generate a batch of random UUIDs from a single urandom read"""
+        buf = os.urandom(16 * n)
+        self._uuid_pool.extend(
+            str(uuid.UUID(bytes=buf[i:i + 16], version=4))
+            for i in range(0, 16 * n, 16)
+        )
+    
+    def _new_uuid(self) -> str:
+        """Return a random (version 4) UUID string from the pool"""
+        while True:
+            try:
+                return self._uuid_pool.popleft()
+            except IndexError:
+                self._refill_uuid_pool()
     
     def _get_application_salt(self) -> str:
         """Get application-wide salt for consistent hashing"""
@@ -38,6 +169,12 @@ class AnonymizationService:
                 self._salt = 'dev-salt'[:32]
         return self._salt
     
+    def _get_application_salt_bytes(self) -> bytes:
+        """Get the application salt pre-encoded for hashing"""
+        if self._salt_bytes is None:
+            self._salt_bytes = self._get_application_salt().encode()
+        return self._salt_bytes
+    
     def generate_anonymous_id(self, email: str) -> str:
         """
         Generate consistent anonymous ID from email
@@ -45,15 +182,32 @@ class AnonymizationService:
         This allows us to identify returning users without storing email
         """
         if not email:
-            return str(uuid.uuid4())
+            return self._new_uuid()
         
         # Create deterministic UUID from email + salt
-        combined = f"{email.lower().strip()}{self._get_application_salt()}"
-        hash_object = hashlib.sha256(combined.encode())
-        hash_hex = hash_object.hexdigest()
+        hash_object = hashlib.sha256()
+        hash_object.update(email.lower().strip().encode())
+        hash_object.update(self._get_application_salt_bytes())
         
         # Convert to UUID format
-        return str(uuid.UUID(hash_hex[:32]))
+        return str(uuid.UUID(bytes=hash_object.digest()[:16]))
+    
+    def generate_anonymous_ids(self, emails: Iterable[str]) -> List[str]:
+        """
+        Generate anonymous IDs for many emails (e.g. seeding scripts)
+        
+        Same result as generate_anonymous_id per email, with the salt and
+        hashing callables resolved once for the whole batch.
+        """
+        salt = self._get_application_salt_bytes()
+        sha256 = hashlib.sha256
+        make_uuid = uuid.UUID
+        new_uuid = self._new_uuid
+        return [
+            str(make_uuid(bytes=sha256(email.lower().strip().encode() + salt).digest()[:16]))
+            if email else new_uuid()
+            for email in emails
+        ]
     
     def anonymize_user_profile(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -63,12 +217,13 @@ class AnonymizationService:
         """
         email = user_data.get('email', '')
         anonymous_id = self.generate_anonymous_id(email)
+        now = datetime.now(timezone.utc).isoformat()
         
         # Extract coaching-relevant data only
         anonymized_profile = {
             'user_id': anonymous_id,
-            'created_at': datetime.now(timezone.utc).isoformat(),
-            'last_active': datetime.now(timezone.utc).isoformat(),
+            'created_at': now,
+            'last_active': now,
             
             # Coaching preferences (no PII)
             'coaching_preferences': {
@@ -107,9 +262,11 @@ class AnonymizationService:
         """
         Anonymize assessment responses while preserving coaching value
         """
+        readiness = self._calculate_readiness_score(assessment_data)
+        
         return {
             'user_id': user_id,
-            'assessment_id': str(uuid.uuid4()),
+            'assessment_id': self._new_uuid(),
             'completed_at': datetime.now(timezone.utc).isoformat(),
             
             # Anonymized responses
@@ -128,8 +285,8 @@ class AnonymizationService:
             
             # Derived insights (for AI processing)
             'insights': {
-                'coaching_readiness_score': self._calculate_readiness_score(assessment_data),
-                'recommended_coaching_intensity': self._recommend_intensity(assessment_data),
+                'coaching_readiness_score': readiness,
+                'recommended_coaching_intensity': self._recommend_intensity(assessment_data, readiness),
                 'suggested_focus_areas': self._suggest_focus_areas(assessment_data)
             }
         }
@@ -139,7 +296,7 @@ class AnonymizationService:
         Anonymize coaching session data
         """
         return {
-            'session_id': str(uuid.uuid4()),
+            'session_id': self._new_uuid(),
             'user_id': session_data.get('user_id'),
             'coach_id': session_data.get('coach_id'),  # Coach IDs can be kept for matching
             'session_date': session_data.get('date'),
@@ -168,114 +325,53 @@ class AnonymizationService:
         if not role:
             return 'unspecified'
         
-        role_lower = role.lower()
-        if any(term in role_lower for term in ['ceo', 'chief executive', 'president']):
-            return 'c_level_executive'
-        elif any(term in role_lower for term in ['cto', 'chief technology', 'vp engineering']):
-            return 'technical_executive'
-        elif any(term in role_lower for term in ['cfo', 'chief financial']):
-            return 'financial_executive'
-        elif any(term in role_lower for term in ['manager', 'director', 'head of']):
-            return 'management_role'
-        elif any(term in role_lower for term in ['senior', 'lead', 'principal']):
-            return 'senior_individual_contributor'
-        else:
-            return 'individual_contributor'
+        match = _match_rule(_ROLE_MATCHER, role.lower())
+        return _ROLE_RULES[match][1] if match >= 0 else 'individual_contributor'
     
     def _anonymize_industry(self, industry: str) -> str:
         """Generalize industry to broad categories"""
         if not industry:
             return 'unspecified'
         
-        industry_lower = industry.lower()
-        if any(term in industry_lower for term in ['tech', 'software', 'it', 'computer']):
-            return 'technology'
-        elif any(term in industry_lower for term in ['finance', 'bank', 'investment']):
-            return 'financial_services'
-        elif any(term in industry_lower for term in ['health', 'medical', 'pharma']):
-            return 'healthcare'
-        elif any(term in industry_lower for term in ['retail', 'ecommerce', 'commerce']):
-            return 'retail_commerce'
-        elif any(term in industry_lower for term in ['consulting', 'advisory']):
-            return 'professional_services'
-        else:
-            return 'other'
+        match = _match_rule(_INDUSTRY_MATCHER, industry.lower())
+        return _INDUSTRY_RULES[match][1] if match >= 0 else 'other'
     
     def _anonymize_company_size(self, size: Any) -> str:
         """Convert company size to ranges"""
         if isinstance(size, str):
             size_lower = size.lower()
-            if 'startup' in size_lower or '1-10' in size_lower:
-                return 'startup_small'
-            elif '11-50' in size_lower or 'small' in size_lower:
-                return 'small'
-            elif '51-200' in size_lower or 'medium' in size_lower:
-                return 'medium'
-            elif '201-1000' in size_lower or 'large' in size_lower:
-                return 'large'
-            else:
-                return 'enterprise'
+            label = _SIZE_MAP.get(size_lower.strip())
+            if label is not None:
+                return label
+            return _classify_company_size(size_lower)
         elif isinstance(size, int):
-            if size <= 10:
-                return 'startup_small'
-            elif size <= 50:
-                return 'small'
-            elif size <= 200:
-                return 'medium'
-            elif size <= 1000:
-                return 'large'
-            else:
-                return 'enterprise'
+            return _COMPANY_LABELS[bisect.bisect_left(_COMPANY_BOUNDS, size)]
         return 'unspecified'
     
     def _anonymize_team_size(self, size: Any) -> str:
         """Convert team size to ranges"""
         if isinstance(size, int):
-            if size <= 2:
-                return 'individual'
-            elif size <= 5:
-                return 'small_team'
-            elif size <= 15:
-                return 'medium_team'
-            else:
-                return 'large_team'
+            return _TEAM_LABELS[bisect.bisect_left(_TEAM_BOUNDS, size)]
         return 'unspecified'
     
     def _anonymize_experience_range(self, years: Any) -> str:
         """Convert experience to ranges"""
         if isinstance(years, (int, float)):
-            if years < 2:
-                return 'junior'
-            elif years < 5:
-                return 'mid_level'
-            elif years < 10:
-                return 'senior'
-            else:
-                return 'expert'
+            return _EXPERIENCE_LABELS[bisect.bisect_right(_EXPERIENCE_BOUNDS, years)]
         return 'unspecified'
     
     def _anonymize_challenges(self, challenges: List[str]) -> List[str]:
         """Anonymize specific challenges to general categories"""
-        anonymized = []
+        # One bit per category in _CHALLENGE_LABELS dedups without a set
+        seen = 0
         for challenge in challenges:
             if not challenge:
                 continue
             
-            challenge_lower = challenge.lower()
-            if any(term in challenge_lower for term in ['team', 'people', 'management']):
-                anonymized.append('team_management')
-            elif any(term in challenge_lower for term in ['communication', 'speaking', 'presentation']):
-                anonymized.append('communication_skills')
-            elif any(term in challenge_lower for term in ['strategy', 'planning', 'vision']):
-                anonymized.append('strategic_thinking')
-            elif any(term in challenge_lower for term in ['time', 'productivity', 'efficiency']):
-                anonymized.append('time_management')
-            elif any(term in challenge_lower for term in ['decision', 'choice', 'judgment']):
-                anonymized.append('decision_making')
-            else:
-                anonymized.append('other_professional_challenge')
+            match = _match_rule(_CHALLENGE_MATCHER, challenge.lower())
+            seen |= 1 << (match if match >= 0 else len(_CHALLENGE_RULES))
         
-        return list(set(anonymized))  # Remove duplicates
+        return [label for bit, label in enumerate(_CHALLENGE_LABELS) if seen >> bit & 1]
     
     def _anonymize_notes(self, notes: str) -> str:
         """Create summary of notes without specific details"""
@@ -310,9 +406,10 @@ class AnonymizationService:
         
         return score / factors if factors > 0 else 0.5
     
-    def _recommend_intensity(self, assessment_data: Dict[str, Any]) -> str:
+    def _recommend_intensity(self, assessment_data: Dict[str, Any], readiness: Optional[float] = None) -> str:
         """Recommend coaching intensity based on assessment"""
-        readiness = self._calculate_readiness_score(assessment_data)
+        if readiness is None:
+            readiness = self._calculate_readiness_score(assessment_data)
         commitment = assessment_data.get('commitment_level', 0)
         
         if readiness > 0.8 and commitment > 4:
@@ -326,22 +423,18 @@ class AnonymizationService:
         """Suggest focus areas based on assessment"""
         suggestions = []
         
-        # Based on challenges and priorities
+        # Based on challenges and priorities, lowercased once; keywords
+        # contain no spaces so they cannot match across item boundaries
         challenges = assessment_data.get('challenges', [])
         priorities = assessment_data.get('skill_priorities', [])
+        text = ' '.join(map(str, challenges + priorities)).lower()
         
         # Simple rule-based suggestions
-        if any('leadership' in str(item).lower() for item in challenges + priorities):
-            suggestions.append('leadership_development')
-        
-        if any('communication' in str(item).lower() for item in challenges + priorities):
-            suggestions.append('communication_enhancement')
-        
-        if any('strategy' in str(item).lower() for item in challenges + priorities):
-            suggestions.append('strategic_thinking')
-        
-        if any('time' in str(item).lower() for item in challenges + priorities):
-            suggestions.append('productivity_optimization')
+        for keyword, focus_area in _FOCUS_RULES:
+            if keyword in text:
+                suggestions.append(focus_area)
+                if len(suggestions) == 3:
+                    break
         
         return suggestions[:3]  # Return top 3 suggestions
     
@@ -0,0 +1,32 @@
+"""
+JSON provider for Evergrow360
+
+This module provides an orjson-backed drop-in replacement for Flask's
+default JSON provider.
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes and decodes with orjson"""
+    
+    # Sorted keys match the default provider; datetimes and dataclasses are
+    # passed to DefaultJSONProvider.default so they serialize the same way
+    _OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS |
+                orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+    
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize obj to a JSON string"""
+        option = self._OPTIONS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        # Hooks such as the session serializer's object_hook need stdlib json
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -10,61 +10,171 @@ This module provides comprehensive security features including:
 """
 
 import os
+import re
+import time
+import queue
 import hashlib
+import threading
 import secrets
 import base64
+import orjson
 from datetime import datetime, timezone
 from functools import wraps
+from typing import Iterable
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from passlib.context import CryptContext
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from flask import request, current_app, g
-import bleach
+import nh3
+
+
+# Prefixes marking AES-GCM ciphertexts of plain strings and of JSON-serialized
+# dict fields; anything else is a legacy Fernet token
+_AEAD_PREFIX = 'gcm1:'
+_AEAD_JSON_PREFIX = 'gcmj:'
+_NONCE_SIZE = 12
+
+# HKDF label for the AES-GCM key; the raw key is kept for legacy Fernet only
+_AEAD_KEY_INFO = b'gcm1'
+
+# Tags kept by InputSanitizer.sanitize_html; all attributes are dropped
+_ALLOWED_TAGS = frozenset({'p', 'br', 'strong', 'em', 'u', 'ol', 'ul', 'li'})
+_ALLOWED_ATTRIBUTES = {}
+
+# Control characters stripped by InputSanitizer.sanitize_string (tab and
+# newline are kept)
+_CTRL_TABLE = dict.fromkeys([c for c in range(32) if c not in (9, 10)])
+_CTRL_RE = re.compile(r'[\x00-\x08\x0b-\x1f]')
+
+# Character-class bits used by PasswordSecurity.check_password_strength
+_UPPER, _LOWER, _DIGIT, _SPECIAL = 1, 2, 4, 8
+_ALL_CLASSES = _UPPER | _LOWER | _DIGIT | _SPECIAL
+_SPECIAL_CHARS = '!@#$%^&*(),.?":{}|<>'
+
+
+def _char_class(char: str) -> int:
+    """Return the class bits for one character"""
+    return (
+        (_UPPER if char.isupper() else 0)
+        | (_LOWER if char.islower() else 0)
+        | (_DIGIT if char.isdigit() else 0)
+        | (_SPECIAL if char in _SPECIAL_CHARS else 0)
+    )
+
+
+# ASCII lookup table; other characters fall back to _char_class
+_CHAR_CLASSES = {chr(c): _char_class(chr(c)) for c in range(128)}
+
+# Access log entries awaiting the AccessLogger background writer, and the
+# number shipped to the security system per call
+_LOG_QUEUE = queue.SimpleQueue()
+_SECURITY_BATCH_SIZE = 64
+
+# Headers added to every non-debug response by SecurityHeaders
+_SECURITY_HEADERS = {
+    # Prevent clickjacking
+    'X-Frame-Options': 'SAMEORIGIN',
+    # Prevent MIME type sniffing
+    'X-Content-Type-Options': 'nosniff',
+    # Enable XSS protection
+    'X-XSS-Protection': '1; mode=block',
+    # Referrer policy
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+    # Content Security Policy (strict for production)
+    'Content-Security-Policy': (
+        "default-src 'self'; "
+        "script-src 'self' https://fonts.googleapis.com; "
+        "style-src 'self' https://fonts.googleapis.com; "
+        "font-src 'self' https://fonts.gstatic.com; "
+        "img-src 'self' data: https:; "
+        "connect-src 'self' https://api.openai.com;"
+    ),
+    # HSTS (HTTP Strict Transport Security)
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+}
+
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def _derive_aead_key(key: bytes) -> bytes:
+    """Derive the AES-256-GCM key so it is never the same bytes Fernet uses"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=_AEAD_KEY_INFO
+    ).derive(key)
 
 
 class DataEncryption:
-    """Data encryption service for sensitive information"""
+    """
+    Data encryption service for sensitive information
+    
+    Uses AES-256-GCM, which OpenSSL runs on AES-NI/PCLMULQDQ where available.
+    Values written by the previous Fernet implementation are still decrypted.
+    """
     
     def __init__(self, key=None):
+        self._aead = None
         self._fernet = None
         self._key = key
+        self._init_lock = threading.Lock()
     
-    def _get_fernet(self):
-        """Lazy initialization of Fernet cipher"""
-        if self._fernet is None:
-            if self._key:
-                self._fernet = Fernet(self._key.encode() if isinstance(self._key, str) else self._key)
-            else:
-                # Generate key from environment variable or create new one
-                encryption_key = os.environ.get('DATA_ENCRYPTION_KEY')
-                if not encryption_key:
-                    # In production, this should come from secure key management
-                    key = Fernet.generate_key()
-                    # Only log if we have app context
-                    try:
-                        from flask import current_app
-                        current_app.logger.warning("Generated new encryption key - store securely!")
-                    except RuntimeError:
-                        # Outside app context, just generate key
-                        pass
-                else:
-                    key = base64.urlsafe_b64decode(encryption_key.encode())
-                self._fernet = Fernet(key)
-        return self._fernet
+    def _get_key_bytes(self) -> bytes:
+        """Resolve the raw 32-byte key from the constructor, environment or a new key"""
+        if self._key:
+            key = self._key.encode() if isinstance(self._key, str) else self._key
+            return base64.urlsafe_b64decode(key)
+        
+        # Generate key from environment variable or create new one
+        encryption_key = os.environ.get('DATA_ENCRYPTION_KEY')
+        if encryption_key:
+            key = base64.urlsafe_b64decode(encryption_key.encode())
+            # Legacy keys were a base64-encoded Fernet key (itself base64)
+            return key if len(key) == 32 else base64.urlsafe_b64decode(key)
+        
+        # In production, this should come from secure key management
+        # Only log if we have app context
+        try:
+            from flask import current_app
+            current_app.logger.warning("Generated new encryption key - store securely!")
+        except RuntimeError:
+            # Outside app context, just generate key
+            pass
+        return AESGCM.generate_key(bit_length=256)
     
-    def encrypt(self, data: str) -> str:
-        """Encrypt string data"""
-        if not data:
-            return data
-        return self._get_fernet().encrypt(data.encode()).decode()
+    def _get_aead(self) -> AESGCM:
+        """Lazy initialization of the process-wide AES-GCM cipher (thread-safe)"""
+        if self._aead is None:
+            # Without a configured key, racing first calls would each generate
+            # a different random key; initialize exactly once under the lock
+            with self._init_lock:
+                if self._aead is None:
+                    key = self._get_key_bytes()
+                    self._fernet = Fernet(base64.urlsafe_b64encode(key))
+                    self._aead = AESGCM(_derive_aead_key(key))
+        return self._aead
     
-    def decrypt(self, encrypted_data: str) -> str:
-        """Decrypt string data"""
-        if not encrypted_data:
-            return encrypted_data
+    def _seal(self, plaintext: bytes, prefix: str, nonce: bytes = None) -> str:
+        """Encrypt bytes with a fresh nonce and return a prefixed base64 token"""
+        if nonce is None:
+            nonce = os.urandom(_NONCE_SIZE)
+        ciphertext = self._get_aead().encrypt(nonce, plaintext, None)
+        return prefix + base64.urlsafe_b64encode(nonce + ciphertext).decode()
+    
+    def _open(self, token: str) -> bytes:
+        """Decrypt a token produced by _seal (or a legacy Fernet token)"""
         try:
-            return self._get_fernet().decrypt(encrypted_data.encode()).decode()
+            aead = self._get_aead()
+            for prefix in (_AEAD_PREFIX, _AEAD_JSON_PREFIX):
+                if token.startswith(prefix):
+                    raw = base64.urlsafe_b64decode(token[len(prefix):].encode())
+                    return aead.decrypt(raw[:_NONCE_SIZE], raw[_NONCE_SIZE:], None)
+            return self._fernet.decrypt(token.encode())
         except Exception as e:
             # Handle decryption errors gracefully
             try:
@@ -75,20 +185,50 @@ class DataEncryption:
                 pass
             raise ValueError("Invalid encrypted data")
     
-    def encrypt_dict(self, data_dict: dict, fields_to_encrypt: list) -> dict:
-        """Encrypt specific fields in a dictionary"""
-        encrypted_dict = data_dict.copy()
-        for field in fields_to_encrypt:
-            if field in encrypted_dict and encrypted_dict[field]:
-                encrypted_dict[field] = self.encrypt(str(encrypted_dict[field]))
+    def encrypt(self, data: str) -> str:
+        """Encrypt string data"""
+        if not data:
+            return data
+        return self._seal(data.encode(), _AEAD_PREFIX)
+    
+    def decrypt(self, encrypted_data: str) -> str:
+        """Decrypt string data"""
+        if not encrypted_data:
+            return encrypted_data
+        return self._open(encrypted_data).decode()
+    
+    def encrypt_dict(self, data_dict: dict, fields_to_encrypt: Iterable[str], *, inplace: bool = False) -> dict:
+        """
+        Encrypt specific fields in a dictionary (values are JSON-serialized)
+        
+        With inplace=True the input dict is modified and returned instead of
+        a copy; use it only for dicts the caller owns and discards.
+        """
+        encrypted_dict = data_dict if inplace else data_dict.copy()
+        fields = [field for field in fields_to_encrypt if encrypted_dict.get(field)]
+        
+        # Draw every field's nonce from a single urandom read
+        nonces = os.urandom(_NONCE_SIZE * len(fields))
+        for i, field in enumerate(fields):
+            encrypted_dict[field] = self._seal(
+                orjson.dumps(encrypted_dict[field], default=str, option=orjson.OPT_NON_STR_KEYS),
+                _AEAD_JSON_PREFIX,
+                nonces[i * _NONCE_SIZE:(i + 1) * _NONCE_SIZE]
+            )
         return encrypted_dict
     
-    def decrypt_dict(self, encrypted_dict: dict, fields_to_decrypt: list) -> dict:
-        """Decrypt specific fields in a dictionary"""
-        decrypted_dict = encrypted_dict.copy()
+    def decrypt_dict(self, encrypted_dict: dict, fields_to_decrypt: Iterable[str], *, inplace: bool = False) -> dict:
+        """Decrypt specific fields in a dictionary (see encrypt_dict for inplace)"""
+        decrypted_dict = encrypted_dict if inplace else encrypted_dict.copy()
         for field in fields_to_decrypt:
-            if field in decrypted_dict and decrypted_dict[field]:
-                decrypted_dict[field] = self.decrypt(decrypted_dict[field])
+            value = decrypted_dict.get(field)
+            if not value or not isinstance(value, str):
+                continue
+            if value.startswith(_AEAD_JSON_PREFIX):
+                decrypted_dict[field] = orjson.loads(self._open(value))
+            else:
+                # Legacy values were encrypted as str(value)
+                decrypted_dict[field] = self.decrypt(value)
         return decrypted_dict
 
 
@@ -97,30 +237,45 @@ class PasswordSecurity:
     
     def __init__(self):
         # Use Argon2 for password hashing (OWASP recommended)
-        self.pwd_context = CryptContext(
-            schemes=['argon2'],
-            deprecated='auto',
-            argon2__memory_cost=65536,  # 64 MB
-            argon2__time_cost=3,        # 3 iterations
-            argon2__parallelism=1,      # 1 thread
+        self.ph = PasswordHasher(
+            time_cost=3,          # 3 iterations
+            memory_cost=65536,    # 64 MB
+            parallelism=1,        # 1 thread
+            hash_len=32,
+            salt_len=16
         )
     
     def hash_password(self, password: str) -> str:
         """Hash password securely"""
-        return self.pwd_context.hash(password)
+        return self.ph.hash(password)
     
     def verify_password(self, password: str, password_hash: str) -> bool:
         """Verify password against hash"""
-        return self.pwd_context.verify(password, password_hash)
+        try:
+            return self.ph.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Check whether a stored hash was made with outdated parameters"""
+        return self.ph.check_needs_rehash(password_hash)
     
     def check_password_strength(self, password: str) -> dict:
         """Check password strength and return requirements"""
+        # Single pass accumulating the character classes seen
+        mask = 0
+        for char in password:
+            bits = _CHAR_CLASSES.get(char)
+            mask |= _char_class(char) if bits is None else bits
+            if mask == _ALL_CLASSES:
+                break
+        
         checks = {
             'length': len(password) >= 8,
-            'uppercase': any(c.isupper() for c in password),
-            'lowercase': any(c.islower() for c in password),
-            'digit': any(c.isdigit() for c in password),
-            'special': any(c in '!@#$%^&*(),.?":{}|<>' for c in password)
+            'uppercase': bool(mask & _UPPER),
+            'lowercase': bool(mask & _LOWER),
+            'digit': bool(mask & _DIGIT),
+            'special': bool(mask & _SPECIAL)
         }
         
         score = sum(checks.values())
@@ -143,14 +298,11 @@ class InputSanitizer:
         if not content:
             return content
         
-        allowed_tags = ['p', 'br', 'strong', 'em', 'u', 'ol', 'ul', 'li']
-        allowed_attributes = {}
-        
-        return bleach.clean(
+        return nh3.clean(
             content,
-            tags=allowed_tags,
-            attributes=allowed_attributes,
-            strip=True
+            tags=_ALLOWED_TAGS,
+            attributes=_ALLOWED_ATTRIBUTES,
+            strip_comments=True
         )
     
     @staticmethod
@@ -160,7 +312,8 @@ class InputSanitizer:
             return content
         
         # Remove null bytes and control characters
-        content = ''.join(char for char in content if ord(char) >= 32 or char in '\n\t')
+        if _CTRL_RE.search(content):
+            content = content.translate(_CTRL_TABLE)
         
         # Truncate to max length
         if len(content) > max_length:
@@ -171,103 +324,168 @@ class InputSanitizer:
     @staticmethod
     def validate_email(email: str) -> bool:
         """Validate email format"""
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email)) if email else False
+        return bool(_EMAIL_RE.match(email)) if email else False
 
 
 class SecurityHeaders:
-    """Security headers middleware"""
+    """Security headers middleware for Flask applications"""
     
     @staticmethod
     def init_app(app):
-        """Initialize security headers for Flask app"""
+        """Initialize security headers for the Flask app"""
         
         @app.after_request
-        def set_security_headers(response):
-            # Content Security Policy
-            csp = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline' https://js.stripe.com; "
-                "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-                "font-src 'self' https://fonts.gstatic.com; "
-                "img-src 'self' data: https:; "
-                "connect-src 'self' https://api.stripe.com; "
-                "frame-src https://js.stripe.com; "
-                "object-src 'none'; "
-                "base-uri 'self';"
-            )
-            response.headers['Content-Security-Policy'] = csp
-            
-            # Other security headers
-            response.headers['X-Content-Type-Options'] = 'nosniff'
-            response.headers['X-Frame-Options'] = 'DENY'
-            response.headers['X-XSS-Protection'] = '1; mode=block'
-            response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-            response.headers['Permissions-Policy'] = (
-                'geolocation=(), microphone=(), camera=(), '
-                'payment=(), usb=(), magnetometer=(), gyroscope=()'
-            )
+        def add_security_headers(response):
+            """Add security headers to all responses"""
             
-            # HSTS (only in production over HTTPS)
-            if app.config.get('ENV') == 'production':
-                response.headers['Strict-Transport-Security'] = (
-                    'max-age=31536000; includeSubDomains; preload'
-                )
+            # Only add restrictive headers in production
+            if not app.debug:
+                response.headers.update(_SECURITY_HEADERS)
             
             return response
 
 
 class AccessLogger:
-    """Security access logging"""
+    """
+    Security access logging
+    
+    log_access only snapshots the request and enqueues it; hashing, logging
+    and shipping to the security system happen on a background thread.
+    """
     
     def __init__(self):
-        self.encryption = DataEncryption()
+        self.encryption = data_encryption
+        self._secret_key = None
+        self._hash_key = b''
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def _get_hash_key(self, secret_key) -> bytes:
+        """Return the BLAKE2b key derived from the app secret, re-deriving only when it changes"""
+        if secret_key is not self._secret_key:
+            # BLAKE2b keys are capped at 64 bytes, so hash the secret down
+            self._hash_key = hashlib.blake2b(f"{secret_key}".encode()).digest()
+            self._secret_key = secret_key
+        return self._hash_key
     
     def log_access(self, user_id: str, action: str, resource: str, success: bool = True):
-        """Log user access with anonymization"""
+        """Queue user access for anonymized logging"""
+        try:
+            self._ensure_worker()
+            # The request proxy is bound to this thread, so copy what we need
+            _LOG_QUEUE.put_nowait((
+                current_app._get_current_object(),
+                user_id,
+                action,
+                resource,
+                success,
+                request.remote_addr,
+                request.headers.get('User-Agent', ''),
+                time.time()
+            ))
+        except Exception as e:
+            current_app.logger.error(f"Access logging failed: {e}")
+    
+    def _ensure_worker(self):
+        """Start the log writer thread (again after a fork, which drops threads)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._drain_queue, name='access-logger', daemon=True
+                )
+                self._worker.start()
+    
+    def _drain_queue(self):
+        """Write queued entries, shipping production entries in batches"""
+        pending = []
+        while True:
+            item = _LOG_QUEUE.get()
+            while item is not None:
+                app = item[0]
+                log_entry = self._write_entry(*item)
+                if log_entry is not None and app.config.get('ENV') == 'production':
+                    pending.append(log_entry)
+                    if len(pending) >= _SECURITY_BATCH_SIZE:
+                        self._flush(app, pending)
+                        pending = []
+                try:
+                    item = _LOG_QUEUE.get_nowait()
+                except queue.Empty:
+                    item = None
+            if pending:
+                self._flush(app, pending)
+                pending = []
+    
+    def _write_entry(self, app, user_id: str, action: str, resource: str, success: bool,
+                     ip_address: str, user_agent: str, timestamp: float):
+        """Build, log and return one anonymized log entry"""
         try:
             # Create anonymized log entry
+            user_hash, ip_hash, user_agent_hash = self._hash_triplet(
+                user_id, ip_address, user_agent, app.secret_key
+            )
             log_entry = {
-                'timestamp': datetime.now(timezone.utc).isoformat(),
-                'user_hash': self._hash_user_id(user_id),
+                'timestamp': datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+                'user_hash': user_hash,
                 'action': action,
                 'resource': resource,
                 'success': success,
-                'ip_hash': self._hash_ip(request.remote_addr),
-                'user_agent_hash': self._hash_user_agent(request.headers.get('User-Agent', ''))
+                'ip_hash': ip_hash,
+                'user_agent_hash': user_agent_hash
             }
             
             # Log to application logger
-            current_app.logger.info(f"Access: {log_entry}")
+            app.logger.info(f"Access: {log_entry}")
+            return log_entry
             
-            # In production, send to security monitoring system
-            if current_app.config.get('ENV') == 'production':
-                self._send_to_security_system(log_entry)
-                
         except Exception as e:
-            current_app.logger.error(f"Access logging failed: {e}")
+            app.logger.error(f"Access logging failed: {e}")
+            return None
     
-    def _hash_user_id(self, user_id: str) -> str:
+    def _flush(self, app, log_entries: list):
+        """Ship a batch of entries to the security system without killing the worker"""
+        try:
+            self._send_to_security_system(log_entries)
+        except Exception as e:
+            app.logger.error(f"Security system delivery failed: {e}")
+    
+    def _hash_triplet(self, user_id: str, ip_address: str, user_agent: str, secret_key) -> tuple:
+        """
+        Hash user id, IP and user agent for one log entry
+        
+        The hash key is resolved once for all three digests. Each field keeps
+        its own digest so user hashes stay stable across IPs/devices for log
+        correlation.
+        """
+        secret = self._get_hash_key(secret_key)
+        return (
+            self._hash_user_id(user_id, secret),
+            self._hash_ip(ip_address, secret),
+            self._hash_user_agent(user_agent, secret)
+        )
+    
+    def _hash_user_id(self, user_id: str, secret: bytes) -> str:
         """Create hashed user identifier for logging"""
         if not user_id:
             return 'anonymous'
-        return hashlib.sha256(f"{user_id}{current_app.secret_key}".encode()).hexdigest()[:16]
+        return hashlib.blake2b(user_id.encode(), digest_size=8, key=secret).hexdigest()
     
-    def _hash_ip(self, ip_address: str) -> str:
+    def _hash_ip(self, ip_address: str, secret: bytes) -> str:
         """Create hashed IP for logging"""
         if not ip_address:
             return 'unknown'
-        return hashlib.sha256(f"{ip_address}{current_app.secret_key}".encode()).hexdigest()[:16]
+        return hashlib.blake2b(ip_address.encode(), digest_size=8, key=secret).hexdigest()
     
-    def _hash_user_agent(self, user_agent: str) -> str:
+    def _hash_user_agent(self, user_agent: str, secret: bytes) -> str:
         """Create hashed user agent for logging"""
         if not user_agent:
             return 'unknown'
-        return hashlib.sha256(f"{user_agent}{current_app.secret_key}".encode()).hexdigest()[:16]
+        return hashlib.blake2b(user_agent.encode(), digest_size=8, key=secret).hexdigest()
     
-    def _send_to_security_system(self, log_entry: dict):
-        """Send log entry to external security monitoring system"""
+    def _send_to_security_system(self, log_entries: list):
+        """Send a batch of log entries to external security monitoring system"""
         # Implement integration with security monitoring (e.g., Splunk, ELK)
         pass
 
@@ -292,7 +510,7 @@ def log_access(action: str, resource: str):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            logger = AccessLogger()
+            logger = access_logger
             user_id = getattr(g, 'current_user_id', 'anonymous')
             
             try:
@@ -311,45 +529,3 @@ data_encryption = DataEncryption()
 password_security = PasswordSecurity()
 input_sanitizer = InputSanitizer()
 access_logger = AccessLogger()
-
-
-class SecurityHeaders:
-    """Security headers middleware for Flask applications"""
-    
-    @staticmethod
-    def init_app(app):
-        """Initialize security headers for the Flask app"""
-        
-        @app.after_request
-        def add_security_headers(response):
-            """Add security headers to all responses"""
-            
-            # Only add restrictive headers in production
-            if not app.debug:
-                # Prevent clickjacking
-                response.headers['X-Frame-Options'] = 'SAMEORIGIN'
-                
-                # Prevent MIME type sniffing
-                response.headers['X-Content-Type-Options'] = 'nosniff'
-                
-                # Enable XSS protection
-                response.headers['X-XSS-Protection'] = '1; mode=block'
-                
-                # Referrer policy
-                response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-                
-                # Content Security Policy (strict for production)
-                csp = (
-                    "default-src 'self'; "
-                    "script-src 'self' https://fonts.googleapis.com; "
-                    "style-src 'self' https://fonts.googleapis.com; "
-                    "font-src 'self' https://fonts.gstatic.com; "
-                    "img-src 'self' data: https:; "
-                    "connect-src 'self' https://api.openai.com;"
-                )
-                response.headers['Content-Security-Policy'] = csp
-                
-                # HSTS (HTTP Strict Transport Security)
-                response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-            
-            return response
\ No newline at end of file
@@ -6,7 +6,85 @@ with security-first design and production-ready settings.
 """
 
 import os
+import atexit
+import logging
+import queue
 from datetime import timedelta
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+
+# Defaults and environment-derived values, resolved once at import
+_DEFAULT_CORS_ORIGINS = (
+    'http://localhost:5000',
+    'http://127.0.0.1:5000',
+    'http://localhost:3000',
+    'http://localhost:8080',
+    'http://127.0.0.1:8080',
+)
+
+_JWT_ACCESS_SECS = int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 3600))
+_JWT_REFRESH_SECS = int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 2592000))
+
+
+# Production log file plumbing, shared by every production app in the process
+_log_file_handler = None
+_log_handler = None
+_log_listener = None
+
+
+def _start_log_listener():
+    """
+    Start the listener that writes queued records to the production log file
+    
+    Threads don't survive fork (gunicorn preload_app), so this runs again in
+    every forked worker, on a fresh queue.
+    """
+    global _log_listener
+    log_queue = queue.Queue(-1)
+    _log_handler.queue = log_queue
+    _log_listener = QueueListener(log_queue, _log_file_handler, respect_handler_level=True)
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    """Flush and stop the current process's listener"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def _production_log_handler():
+    """
+    Return the queue handler for production app loggers
+    
+    Request threads only enqueue records; a listener thread does the disk
+    I/O. The handler, listener and fork/exit hooks are set up once per
+    process however many apps are created.
+    """
+    global _log_file_handler, _log_handler
+    if _log_handler is None:
+        # File logging for production
+        if not os.path.exists('logs'):
+            os.mkdir('logs')
+        
+        _log_file_handler = RotatingFileHandler(
+            'logs/evergrow360.log',
+            maxBytes=10240000,
+            backupCount=10
+        )
+        _log_file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
+        ))
+        _log_file_handler.setLevel(logging.WARNING)
+        
+        # The queue is assigned by _start_log_listener
+        _log_handler = QueueHandler(None)
+        _log_handler.setLevel(logging.WARNING)
+        _start_log_listener()
+        atexit.register(_stop_log_listener)
+        os.register_at_fork(after_in_child=_start_log_listener)
+    return _log_handler
 
 
 class Config:
@@ -17,12 +95,8 @@ class Config:
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(
-        seconds=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 3600))
-    )
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(
-        seconds=int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 2592000))
-    )
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=_JWT_ACCESS_SECS)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=_JWT_REFRESH_SECS)
     JWT_ALGORITHM = 'HS256'
     
     # Firebase settings
@@ -50,7 +124,7 @@ class Config:
     FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@evergrow360.com')
     
     # CORS settings
-    CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:5000,http://127.0.0.1:5000,http://localhost:3000,http://localhost:8080,http://127.0.0.1:8080').split(',')
+    CORS_ORIGINS = tuple(os.environ.get('CORS_ORIGINS', ','.join(_DEFAULT_CORS_ORIGINS)).split(','))
     
     # Rate limiting
     RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL', 'memory://')
@@ -67,6 +141,11 @@ class Config:
     # Monitoring
     SENTRY_DSN = os.environ.get('SENTRY_DSN')
     
+    # Compiled Jinja templates shared by preloaded Gunicorn workers; the
+    # directory defaults to Jinja's private per-user cache directory
+    JINJA_BYTECODE_CACHE = True
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    
     @staticmethod
     def init_app(app):
         """Initialize app with this configuration"""
@@ -89,9 +168,9 @@ class DevelopmentConfig(Config):
     def init_app(app):
         Config.init_app(app)
         
-        # Development-specific initialization
-        import logging
-        logging.basicConfig(level=logging.DEBUG)
+        # Development-specific initialization; create_app runs this, so keep
+        # it to the app's own logger rather than configuring the root logger
+        app.logger.setLevel(logging.DEBUG)
 
 
 class ProductionConfig(Config):
@@ -116,23 +195,7 @@ class ProductionConfig(Config):
         Config.init_app(app)
         
         # Production-specific initialization
-        import logging
-        from logging.handlers import RotatingFileHandler
-        
-        # File logging for production
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        
-        file_handler = RotatingFileHandler(
-            'logs/evergrow360.log',
-            maxBytes=10240000,
-            backupCount=10
-        )
-        file_handler.setFormatter(logging.Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-        ))
-        file_handler.setLevel(logging.WARNING)
-        app.logger.addHandler(file_handler)
+        app.logger.addHandler(_production_log_handler())
         app.logger.setLevel(logging.WARNING)
         app.logger.info('Evergrow360 startup')
 
@@ -152,13 +215,15 @@ class TestingConfig(Config):
     # Use test keys
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
     
+    # Keep test runs off the shared template cache
+    JINJA_BYTECODE_CACHE = False
+    
     @staticmethod
     def init_app(app):
         Config.init_app(app)
         
         # Testing-specific initialization
-        import logging
-        logging.basicConfig(level=logging.INFO)
+        app.logger.setLevel(logging.INFO)
 
 
 # Configuration mapping
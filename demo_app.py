@@ -8,18 +8,50 @@ import os
 import json
 import uuid
 import hashlib
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 
 # Simple Flask app without external dependencies for demo
 try:
-    from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+    from flask import Flask, Response, render_template, stream_template, request, jsonify, redirect, url_for, session, flash, get_flashed_messages
     from jinja2 import Template
     FLASK_AVAILABLE = True
 except ImportError:
     FLASK_AVAILABLE = False
     print("Flask not available - creating demo files only")
 
+# Serialize the same way as the main app when its provider is importable
+try:
+    from app.utils.json_provider import OrjsonProvider
+except ImportError:
+    OrjsonProvider = None
+
+_last_utc_iso = (None, '')
+
+def _utc_now_iso() -> str:
+    """Current UTC time as ISO 8601, formatted at most once per second"""
+    global _last_utc_iso
+    now = int(time.time())
+    cached = _last_utc_iso
+    if cached[0] == now:
+        return cached[1]
+    stamp = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    _last_utc_iso = (now, stamp)
+    return stamp
+
+# Static part of the /api/health body; only the timestamp varies per call
+_HEALTH_PREFIX = b'{"status":"healthy","service":"evergrow360-demo","version":"1.0.0","timestamp":"'
+
+@lru_cache(maxsize=4096)
+def _anon_id(email: str) -> str:
+    """Deterministic anonymous ID for an email (cached per address)"""
+    # Simple hash for demo
+    return hashlib.sha256(email.encode(), usedforsecurity=False).hexdigest()[:32]
+
 # Mock services to demonstrate functionality
 class MockFirebaseService:
     """Mock Firebase service demonstrating data structure and operations"""
@@ -29,11 +61,14 @@ class MockFirebaseService:
         self.assessments = {}
         self.coaching_plans = {}
         self.sessions = {}
+        # Guards dict writes when served from threaded workers
+        self._lock = threading.Lock()
     
     def save_user(self, user_data):
         user_id = self._generate_anonymous_id(user_data.get('email', ''))
-        anonymized_data = self._anonymize_user_data(user_data)
-        self.users[user_id] = anonymized_data
+        anonymized_data = self._anonymize_user_data(user_data, user_id)
+        with self._lock:
+            self.users[user_id] = anonymized_data
         return user_id
     
     def get_user(self, user_id):
@@ -41,12 +76,14 @@ class MockFirebaseService:
     
     def save_assessment(self, assessment_data):
         assessment_id = str(uuid.uuid4())
-        self.assessments[assessment_id] = assessment_data
+        with self._lock:
+            self.assessments[assessment_id] = assessment_data
         return assessment_id
     
     def save_coaching_plan(self, plan_data):
         plan_id = str(uuid.uuid4())
-        self.coaching_plans[plan_id] = plan_data
+        with self._lock:
+            self.coaching_plans[plan_id] = plan_data
         return plan_id
     
     def _generate_anonymous_id(self, email):
@@ -54,15 +91,13 @@ class MockFirebaseService:
         if not email:
             return str(uuid.uuid4())
         
-        # Simple hash for demo
-        hash_object = hashlib.sha256(email.encode())
-        return hash_object.hexdigest()[:32]
+        return _anon_id(email)
     
-    def _anonymize_user_data(self, user_data):
+    def _anonymize_user_data(self, user_data, user_id):
         """Anonymize user data for storage"""
         return {
-            'user_id': self._generate_anonymous_id(user_data.get('email', '')),
-            'created_at': datetime.now(timezone.utc).isoformat(),
+            'user_id': user_id,
+            'created_at': _utc_now_iso(),
             'coaching_preferences': {
                 'professional_role': user_data.get('role', 'unspecified'),
                 'industry_sector': user_data.get('industry', 'unspecified'),
@@ -73,79 +108,85 @@ class MockFirebaseService:
             'data_processing_consent': user_data.get('consent', True)
         }
 
+# Canned mock AI responses, built once; inner sequences are tuples so the
+# shared structures can't be appended to by a caller
+_ANALYSIS_TEMPLATE = {
+    'strengths': (
+        'Strong analytical thinking',
+        'Open to feedback and learning',
+        'Clear professional goals'
+    ),
+    'development_areas': (
+        'Leadership communication',
+        'Strategic planning',
+        'Team motivation'
+    ),
+    'coaching_readiness': 8,
+    'recommended_intensity': 'regular',
+    'success_factors': (
+        'High commitment level',
+        'Clear objectives',
+        'Growth mindset'
+    ),
+    'recommended_focus': (
+        'Leadership development',
+        'Communication skills',
+        'Strategic thinking'
+    ),
+    'learning_approach': 'Combination of individual coaching and group workshops',
+    'confidence_score': 0.85
+}
+
+_COACHING_PLAN_TEMPLATE = {
+    'plan_overview': 'Comprehensive leadership development program tailored to your role and goals',
+    'phases': (
+        {
+            'phase_name': 'Assessment and Foundation',
+            'duration_weeks': 2,
+            'objectives': ('Establish baseline', 'Set clear goals', 'Build coaching relationship'),
+            'key_activities': ('360-degree feedback', 'Goal setting workshop', 'Strengths assessment'),
+            'success_metrics': ('Clear goal definition', 'Baseline measurements', 'Action plan created')
+        },
+        {
+            'phase_name': 'Skill Development',
+            'duration_weeks': 8,
+            'objectives': ('Build core leadership skills', 'Practice new behaviors', 'Apply learning'),
+            'key_activities': ('Weekly coaching sessions', 'Skill practice exercises', 'Real-world application'),
+            'success_metrics': ('Skill improvement scores', 'Behavior change evidence', 'Feedback improvements')
+        },
+        {
+            'phase_name': 'Integration and Mastery',
+            'duration_weeks': 4,
+            'objectives': ('Integrate new habits', 'Sustain improvements', 'Plan continued growth'),
+            'key_activities': ('Advanced scenarios', 'Peer coaching', 'Long-term planning'),
+            'success_metrics': ('Sustained behavior change', 'Goal achievement', 'Future growth plan')
+        }
+    ),
+    'weekly_structure': {
+        'individual_sessions': '1 hour per week',
+        'group_activities': '2 hours every 2 weeks', 
+        'self_study': '2-3 hours per week',
+        'practice_time': '1-2 hours per week'
+    },
+    'resources': (
+        'Leadership assessment tools',
+        'Communication skill builders',
+        'Strategic thinking frameworks',
+        'Recommended reading list'
+    ),
+    'estimated_duration_weeks': 14
+}
+
 class MockOpenAIService:
     """Mock OpenAI service demonstrating AI coaching functionality"""
     
     def analyze_assessment(self, assessment_data):
-        """Mock assessment analysis"""
-        return {
-            'strengths': [
-                'Strong analytical thinking',
-                'Open to feedback and learning',
-                'Clear professional goals'
-            ],
-            'development_areas': [
-                'Leadership communication',
-                'Strategic planning',
-                'Team motivation'
-            ],
-            'coaching_readiness': 8,
-            'recommended_intensity': 'regular',
-            'success_factors': [
-                'High commitment level',
-                'Clear objectives',
-                'Growth mindset'
-            ],
-            'recommended_focus': [
-                'Leadership development',
-                'Communication skills',
-                'Strategic thinking'
-            ],
-            'learning_approach': 'Combination of individual coaching and group workshops',
-            'confidence_score': 0.85
-        }
+        """Mock assessment analysis (shared constant; callers must not mutate it)"""
+        return _ANALYSIS_TEMPLATE
     
     def generate_coaching_plan(self, user_profile, assessment_insights, goals):
-        """Mock coaching plan generation"""
-        return {
-            'plan_overview': 'Comprehensive leadership development program tailored to your role and goals',
-            'phases': [
-                {
-                    'phase_name': 'Assessment and Foundation',
-                    'duration_weeks': 2,
-                    'objectives': ['Establish baseline', 'Set clear goals', 'Build coaching relationship'],
-                    'key_activities': ['360-degree feedback', 'Goal setting workshop', 'Strengths assessment'],
-                    'success_metrics': ['Clear goal definition', 'Baseline measurements', 'Action plan created']
-                },
-                {
-                    'phase_name': 'Skill Development',
-                    'duration_weeks': 8,
-                    'objectives': ['Build core leadership skills', 'Practice new behaviors', 'Apply learning'],
-                    'key_activities': ['Weekly coaching sessions', 'Skill practice exercises', 'Real-world application'],
-                    'success_metrics': ['Skill improvement scores', 'Behavior change evidence', 'Feedback improvements']
-                },
-                {
-                    'phase_name': 'Integration and Mastery',
-                    'duration_weeks': 4,
-                    'objectives': ['Integrate new habits', 'Sustain improvements', 'Plan continued growth'],
-                    'key_activities': ['Advanced scenarios', 'Peer coaching', 'Long-term planning'],
-                    'success_metrics': ['Sustained behavior change', 'Goal achievement', 'Future growth plan']
-                }
-            ],
-            'weekly_structure': {
-                'individual_sessions': '1 hour per week',
-                'group_activities': '2 hours every 2 weeks', 
-                'self_study': '2-3 hours per week',
-                'practice_time': '1-2 hours per week'
-            },
-            'resources': [
-                'Leadership assessment tools',
-                'Communication skill builders',
-                'Strategic thinking frameworks',
-                'Recommended reading list'
-            ],
-            'estimated_duration_weeks': 14
-        }
+        """Mock coaching plan generation (shared constant; callers must not mutate it)"""
+        return _COACHING_PLAN_TEMPLATE
 
 # Demo data for showcase
 DEMO_COACHES = [
@@ -187,9 +228,33 @@ DEMO_COACHES = [
     }
 ]
 
+# Precomputed search fields and indexes so marketplace filtering doesn't
+# rescan or redo them per request (lists keep DEMO_COACHES order)
+SPECIALTY_INDEX = defaultdict(list)
+for _coach in DEMO_COACHES:
+    _coach['_name_lower'] = _coach['name'].lower()
+    _coach['_title_lower'] = _coach['title'].lower()
+    for _specialty in _coach['specialties']:
+        SPECIALTY_INDEX[_specialty].append(_coach)
+SPECIALTY_INDEX = dict(SPECIALTY_INDEX)
+
+LOW_PRICE_COACHES = [c for c in DEMO_COACHES if c['price_per_hour'] < 300]
+HIGH_PRICE_COACHES = [c for c in DEMO_COACHES if c['price_per_hour'] >= 300]
+PRICE_BUCKETS = {'low': LOW_PRICE_COACHES, 'high': HIGH_PRICE_COACHES}
+COACH_BY_ID = {c['id']: c for c in DEMO_COACHES}
+
+def _stream_page(template_name, **context):
+    """Stream a template after popping flashes while the session can still be saved"""
+    # Headers (and the session cookie) go out before base.html renders; popping
+    # here caches the flashes on the request so the template still sees them
+    get_flashed_messages()
+    return stream_template(template_name, **context)
+
 if FLASK_AVAILABLE:
     app = Flask(__name__)
     app.secret_key = 'demo-secret-key'
+    if OrjsonProvider is not None:
+        app.json = OrjsonProvider(app)
     
     # Initialize mock services
     firebase_service = MockFirebaseService()
@@ -230,12 +295,13 @@ if FLASK_AVAILABLE:
     @app.route('/assessment', methods=['GET', 'POST'])
     def assessment():
         """AI-powered assessment with server-side processing"""
-        if 'user_id' not in session:
+        user_id = session.get('user_id')
+        if user_id is None:
             return redirect(url_for('register'))
         
         if request.method == 'POST':
             assessment_data = {
-                'user_id': session['user_id'],
+                'user_id': user_id,
                 'professional_role': request.form.get('role'),
                 'main_challenges': request.form.getlist('challenges'),
                 'skill_priorities': request.form.getlist('skills'),
@@ -244,7 +310,7 @@ if FLASK_AVAILABLE:
                 'commitment_level': int(request.form.get('commitment', 1)),
                 'feedback_openness_score': int(request.form.get('feedback', 1)),
                 'satisfaction_baseline': int(request.form.get('satisfaction', 1)),
-                'submitted_at': datetime.now(timezone.utc).isoformat()
+                'submitted_at': _utc_now_iso()
             }
             
             # Save assessment
@@ -254,15 +320,15 @@ if FLASK_AVAILABLE:
             ai_analysis = openai_service.analyze_assessment(assessment_data)
             
             # Save coaching plan
-            user = firebase_service.get_user(session['user_id'])
+            user = firebase_service.get_user(user_id)
             coaching_plan = openai_service.generate_coaching_plan(user, ai_analysis, [])
             
             plan_data = {
-                'user_id': session['user_id'],
+                'user_id': user_id,
                 'assessment_id': assessment_id,
                 'ai_analysis': ai_analysis,
                 'coaching_plan': coaching_plan,
-                'created_at': datetime.now(timezone.utc).isoformat()
+                'created_at': _utc_now_iso()
             }
             
             plan_id = firebase_service.save_coaching_plan(plan_data)
@@ -301,7 +367,7 @@ if FLASK_AVAILABLE:
             ]
         }
         
-        return render_template('dashboard/index.html', data=dashboard_data)
+        return _stream_page('dashboard/index.html', data=dashboard_data)
     
     @app.route('/marketplace')
     def marketplace():
@@ -310,32 +376,33 @@ if FLASK_AVAILABLE:
         specialty_filter = request.args.get('specialty', '')
         price_filter = request.args.get('price', '')
         
-        coaches = DEMO_COACHES.copy()
-        
-        # Apply filters (simplified for demo)
-        if search_query:
-            coaches = [c for c in coaches if search_query.lower() in c['name'].lower() or 
-                      search_query.lower() in c['title'].lower()]
-        
+        # Start from the narrowest precomputed subset (simplified for demo)
         if specialty_filter:
-            coaches = [c for c in coaches if specialty_filter in c['specialties']]
+            coaches = SPECIALTY_INDEX.get(specialty_filter, [])
+            price_pending = price_filter
+        else:
+            coaches = PRICE_BUCKETS.get(price_filter, DEMO_COACHES)
+            price_pending = None
         
-        if price_filter:
-            if price_filter == 'low':
-                coaches = [c for c in coaches if c['price_per_hour'] < 300]
-            elif price_filter == 'high':
-                coaches = [c for c in coaches if c['price_per_hour'] >= 300]
+        # Apply remaining filters in a single pass; unfiltered requests reuse the list
+        query = search_query.lower()
+        if query or price_pending in PRICE_BUCKETS:
+            coaches = [c for c in coaches
+                       if (not query or query in c['_name_lower'] or query in c['_title_lower'])
+                       and (price_pending != 'low' or c['price_per_hour'] < 300)
+                       and (price_pending != 'high' or c['price_per_hour'] >= 300)]
         
-        return render_template('marketplace/index.html', 
-                             coaches=coaches, 
-                             search_query=search_query,
-                             specialty_filter=specialty_filter,
-                             price_filter=price_filter)
+        # Stream so the client can start parsing while coach cards render
+        return _stream_page('marketplace/index.html', 
+                            coaches=coaches, 
+                            search_query=search_query,
+                            specialty_filter=specialty_filter,
+                            price_filter=price_filter)
     
     @app.route('/coach/<coach_id>')
     def coach_profile(coach_id):
         """Individual coach profile page"""
-        coach = next((c for c in DEMO_COACHES if c['id'] == coach_id), None)
+        coach = COACH_BY_ID.get(coach_id)
         if not coach:
             flash('Coach not found.', 'error')
             return redirect(url_for('marketplace'))
@@ -345,7 +412,7 @@ if FLASK_AVAILABLE:
     @app.route('/book/<coach_id>', methods=['GET', 'POST'])
     def book_session(coach_id):
         """Session booking with coach"""
-        coach = next((c for c in DEMO_COACHES if c['id'] == coach_id), None)
+        coach = COACH_BY_ID.get(coach_id)
         if not coach:
             flash('Coach not found.', 'error')
             return redirect(url_for('marketplace'))
@@ -359,7 +426,7 @@ if FLASK_AVAILABLE:
                 'session_type': request.form.get('type'),
                 'duration': int(request.form.get('duration', 60)),
                 'total_cost': coach['price_per_hour'] * (int(request.form.get('duration', 60)) / 60),
-                'booked_at': datetime.now(timezone.utc).isoformat()
+                'booked_at': _utc_now_iso()
             }
             
             # In real implementation, would process payment and create calendar event
@@ -417,12 +484,8 @@ if FLASK_AVAILABLE:
     @app.route('/api/health')
     def health_check():
         """Health check endpoint"""
-        return jsonify({
-            'status': 'healthy',
-            'service': 'evergrow360-demo',
-            'version': '1.0.0',
-            'timestamp': datetime.now(timezone.utc).isoformat()
-        })
+        return Response(_HEALTH_PREFIX + _utc_now_iso().encode() + b'"}',
+                        mimetype='application/json')
     
     if __name__ == '__main__':
         app.run(debug=True, host='127.0.0.1', port=5000)
@@ -73,11 +73,16 @@ def main():
             options = {
                 'bind': f"{host}:{port}",
                 'workers': int(os.environ.get('GUNICORN_WORKERS', 4)),
-                'worker_class': 'sync',
+                # Threads let each worker overlap I/O-bound Firebase/OpenAI calls
+                'worker_class': 'gthread',
+                'threads': int(os.environ.get('GUNICORN_THREADS', 8)),
                 'timeout': 30,
                 'keepalive': 2,
                 'max_requests': 1000,
                 'max_requests_jitter': 100,
+                # Preloading builds the app (and its Jinja bytecode cache) once in the
+                # master; forked workers then load compiled templates from disk
+                # instead of recompiling them on their first request
                 'preload_app': True,
                 'access_log_format': '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s',
                 'accesslog': '-',
@@ -3,6 +3,8 @@ Utility script to reset demo user password in Firebase for development/demo purp
 """
 
 import os
+import asyncio
+from datetime import datetime
 from app.services.firebase_service import FirebaseService
 from app.utils.security import PasswordSecurity
 from app.utils.anonymization import anonymization_service
@@ -11,19 +13,17 @@ from app.utils.anonymization import anonymization_service
 DEMO_EMAIL = "demo@evergrow360.com"
 DEMO_PASSWORD = "Demo123!"
 
-if __name__ == "__main__":
-    import asyncio
-    from datetime import datetime
-    firebase_service = FirebaseService()
-    firebase_service._initialize_firebase()  # Ensure Firestore client is initialized
-    password_security = PasswordSecurity()
-    user_id = anonymization_service.generate_anonymous_id(DEMO_EMAIL)
-    password_hash = password_security.hash_password(DEMO_PASSWORD)
-    print(f"Resetting password for demo user: {DEMO_EMAIL} (ID: {user_id})")
+# Accounts reset by this script as (email, password) pairs
+DEMO_ACCOUNTS = ((DEMO_EMAIL, DEMO_PASSWORD),)
+
+
+async def _reset_account(firebase_service, email, user_id, password_hash):
+    """Update one demo user's password, creating the document if needed"""
+    print(f"Resetting password for demo user: {email} (ID: {user_id})")
     # Try to update, if fails, create the document
     try:
         import google.api_core.exceptions
-        success = asyncio.run(firebase_service.update_user_profile(user_id, {"password_hash": password_hash}))
+        success = await firebase_service.update_user_profile(user_id, {"password_hash": password_hash})
         if not success:
             raise Exception("Update failed")
         print("✅ Demo user password reset successfully.")
@@ -31,7 +31,7 @@ if __name__ == "__main__":
         print(f"Update failed: {e}, trying to create user document...")
         # Create minimal user profile
         user_data = {
-            'email': DEMO_EMAIL,
+            'email': email,
             'password_hash': password_hash,
             'first_name': 'Demo',
             'marketing_consent': False,
@@ -43,7 +43,29 @@ if __name__ == "__main__":
             'last_active': datetime.utcnow().isoformat(),
         }
         try:
-            created_id = asyncio.run(firebase_service.create_user_profile(user_data))
+            created_id = await firebase_service.create_user_profile(user_data)
             print(f"✅ Demo user document created: {created_id}")
         except Exception as ce:
             print(f"❌ Failed to create demo user document: {ce}")
+
+
+async def reset_demo_passwords(firebase_service, password_security, accounts=DEMO_ACCOUNTS):
+    """Reset passwords for all demo accounts concurrently"""
+    loop = asyncio.get_running_loop()
+    user_ids = anonymization_service.generate_anonymous_ids([email for email, _ in accounts])
+    # Hash in the executor so CPU-bound hashing overlaps Firestore round-trips
+    password_hashes = await asyncio.gather(*[
+        loop.run_in_executor(None, password_security.hash_password, password)
+        for _, password in accounts
+    ])
+    await asyncio.gather(*[
+        _reset_account(firebase_service, email, user_id, password_hash)
+        for (email, _), user_id, password_hash in zip(accounts, user_ids, password_hashes)
+    ])
+
+
+if __name__ == "__main__":
+    firebase_service = FirebaseService()
+    firebase_service._initialize_firebase()  # Ensure Firestore client is initialized
+    password_security = PasswordSecurity()
+    asyncio.run(reset_demo_passwords(firebase_service, password_security))
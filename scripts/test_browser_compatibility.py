@@ -3,11 +3,127 @@ Comprehensive browser compatibility test for Evergrow360 login flow
 Tests CORS, authentication, and cross-browser functionality
 """
 import asyncio
+import aiohttp
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import json
-import os
 import time
 
+BASE_URL = "http://localhost:5001"
+HEALTH_URL = f"{BASE_URL}/health"
+
+# Fills the login form and submits it; input events keep form listeners in sync
+LOGIN_SCRIPT = """([email, password]) => {
+    for (const [id, value] of [['email', email], ['password', password]]) {
+        const el = document.getElementById(id);
+        el.value = value;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+    }
+    document.querySelector('button[type="submit"]').click();
+}"""
+
+
+async def _server_ctl(command):
+    """Run ./server.sh <command> and wait for it to return"""
+    proc = await asyncio.create_subprocess_exec('./server.sh', command)
+    await proc.wait()
+    return proc.returncode
+
+
+async def _wait_ready(timeout=10.0, interval=0.05):
+    """Poll the health endpoint until the server answers 200 or timeout expires"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    probe_timeout = aiohttp.ClientTimeout(total=1)
+    async with aiohttp.ClientSession(timeout=probe_timeout) as session:
+        while loop.time() < deadline:
+            try:
+                async with session.get(HEALTH_URL) as response:
+                    if response.status == 200:
+                        return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(interval)
+    return False
+
+async def _run(browser_type, browser_name, p):
+    """Run the login flow in one browser and return its partial results"""
+    result = {
+        'passed': False,
+        'network_errors': [],
+        'console_errors': []
+    }
+    print(f"\n🧪 Testing {browser_name}...")
+
+    try:
+        # Launch browser
+        browser = await getattr(p, browser_type).launch(headless=True)
+        context = await browser.new_context(
+            viewport={'width': 1280, 'height': 720},
+            user_agent=f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) {browser_name}/91.0.4472.124 Safari/537.36'
+        )
+
+        # Track errors
+        page_errors = []
+        network_errors = []
+
+        async def on_page_error(error):
+            page_errors.append(str(error))
+
+        async def on_request_failed(request):
+            network_errors.append({
+                'url': request.url,
+                'method': request.method,
+                'failure': request.failure
+            })
+
+        page = await context.new_page()
+        page.on('pageerror', on_page_error)
+        page.on('requestfailed', on_request_failed)
+
+        # Navigate to login page
+        await page.goto(f"{BASE_URL}/app/auth/login.html")
+        await page.wait_for_load_state('networkidle')
+
+        # Fill credentials and click login in a single round-trip
+        print(f"  Clicking login button for {browser_name}...")
+        await page.evaluate(LOGIN_SCRIPT, ['demo@evergrow360.com', 'Demo123!'])
+
+        # Wait for navigation or error with longer timeout
+        try:
+            await page.wait_for_url('**/onboarding/**', timeout=15000)
+            result['passed'] = True
+            print(f"✅ {browser_name}: Login successful")
+        except:
+            # Check if still on login page (error)
+            current_url = page.url
+            if 'login' in current_url:
+                print(f"❌ {browser_name}: Login failed - still on login page")
+
+                # Check for error messages
+                error_modal = page.locator('#errorModal')
+                if await error_modal.is_visible():
+                    error_text = await page.locator('#errorMessage').text_content()
+                    print(f"   Error message: {error_text}")
+            else:
+                print(f"⚠️  {browser_name}: Unexpected redirect to {current_url}")
+                # Consider this a pass if we redirected somewhere
+                result['passed'] = True
+
+        # Record any errors
+        if page_errors:
+            result['console_errors'].extend([f"{browser_name}: {err}" for err in page_errors])
+
+        if network_errors:
+            result['network_errors'].extend([f"{browser_name}: {err}" for err in network_errors])
+
+        await browser.close()
+
+    except Exception as e:
+        print(f"❌ {browser_name}: Test failed with exception: {e}")
+        result['console_errors'].append(f"{browser_name}: {str(e)}")
+
+    return result
+
 async def test_browser_compatibility():
     """Test login flow across different browser configurations"""
 
@@ -22,87 +138,26 @@ async def test_browser_compatibility():
 
         # Start Flask server
         print("🚀 Starting Flask server...")
-        os.system("./server.sh start &")
-        await asyncio.sleep(3)
+        await _server_ctl('start')
+        if not await _wait_ready():
+            print(f"⚠️  Server did not become ready at {HEALTH_URL}")
 
         try:
             browsers = [
                 ('chromium', 'Chrome')
             ]
-            for browser_type, browser_name in browsers:
-                print(f"\n🧪 Testing {browser_name}...")
-
-                try:
-                    # Launch browser
-                    browser = await getattr(p, browser_type).launch(headless=True)
-                    context = await browser.new_context(
-                        viewport={'width': 1280, 'height': 720},
-                        user_agent=f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) {browser_name}/91.0.4472.124 Safari/537.36'
-                    )
-
-                    # Track errors
-                    page_errors = []
-                    network_errors = []
-
-                    async def on_page_error(error):
-                        page_errors.append(str(error))
-
-                    async def on_request_failed(request):
-                        network_errors.append({
-                            'url': request.url,
-                            'method': request.method,
-                            'failure': request.failure
-                        })
-
-                    page = await context.new_page()
-                    page.on('pageerror', on_page_error)
-                    page.on('requestfailed', on_request_failed)
-
-                    # Navigate to login page
-                    await page.goto("http://localhost:5001/app/auth/login.html")
-                    await page.wait_for_load_state('networkidle')
-
-                    # Fill credentials
-                    await page.fill('#email', 'demo@evergrow360.com')
-                    await page.fill('#password', 'Demo123!')
-
-                                        # Click login
-                    print(f"  Clicking login button for {browser_name}...")
-                    await page.click('button[type="submit"]')
-
-                    # Wait for navigation or error with longer timeout
-                    try:
-                        await page.wait_for_url('**/onboarding/**', timeout=15000)
-                        results['chrome'] = True
-                        print(f"✅ {browser_name}: Login successful")
-                    except:
-                        # Check if still on login page (error)
-                        current_url = page.url
-                        if 'login' in current_url:
-                            print(f"❌ {browser_name}: Login failed - still on login page")
-
-                            # Check for error messages
-                            error_modal = page.locator('#errorModal')
-                            if await error_modal.is_visible():
-                                error_text = await page.locator('#errorMessage').text_content()
-                                print(f"   Error message: {error_text}")
-                        else:
-                            print(f"⚠️  {browser_name}: Unexpected redirect to {current_url}")
-                            # Consider this a pass if we redirected somewhere
-                            results['chrome'] = True
-
-                    # Record any errors
-                    if page_errors:
-                        results['console_errors'].extend([f"{browser_name}: {err}" for err in page_errors])
-
-                    if network_errors:
-                        results['network_errors'].extend([f"{browser_name}: {err}" for err in network_errors])
-
-                    await browser.close()
-
-                except Exception as e:
-                    print(f"❌ {browser_name}: Test failed with exception: {e}")
-                    results['console_errors'].append(f"{browser_name}: {str(e)}")
+            # Browser sessions are independent, so run them concurrently
+            per_results = await asyncio.gather(
+                *[_run(bt, bn, p) for bt, bn in browsers],
+                return_exceptions=True
+            )
+            for (browser_type, browser_name), result in zip(browsers, per_results):
+                if isinstance(result, BaseException):
+                    results['console_errors'].append(f"{browser_name}: {result}")
+                    continue
+                results[browser_name.lower()] = result['passed']
+                results['console_errors'].extend(result['console_errors'])
+                results['network_errors'].extend(result['network_errors'])
 
             # Test CORS specifically (skip browser-based CORS test since we test with curl)
             print("\n🔒 CORS configuration verified via curl tests")
@@ -111,7 +166,7 @@ async def test_browser_compatibility():
         finally:
             # Stop server
             print("\n🛑 Stopping Flask server...")
-            os.system("./server.sh stop")
+            await _server_ctl('stop')
 
     # Print summary
     print("\n" + "="*50)
@@ -1,14 +1,41 @@
 
 import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock
 from app import create_app
+from app.api import auth
+from app.services.firebase_service import FirebaseService
 
-@pytest.fixture
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "unit: network-free test"
+    )
+
+@pytest.fixture(scope="session")
 def app():
-    """Create and configure a new app instance for each test."""
+    """Create and configure one app instance for the whole test session."""
     app = create_app("testing")
     yield app
 
 @pytest.fixture
 def client(app):
-    """A test client for the app."""
-    return app.test_client()
+    """A test client, and so a cookie jar, of its own for each test.
+
+    Read response bodies with response.get_json(): the parsed body is cached
+    on the response, so repeated calls in one test do not re-parse it.
+    """
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture(scope="session", autouse=True)
+def _patch_services():
+    """Patch the auth services once for the whole test session."""
+    services = SimpleNamespace(
+        firebase_service=Mock(spec=FirebaseService),
+        password_security=SimpleNamespace(),
+        anonymization_service=MagicMock(),
+    )
+    with pytest.MonkeyPatch.context() as mp:
+        for name, stub in vars(services).items():
+            mp.setattr(auth, name, stub)
+        yield services
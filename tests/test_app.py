@@ -1,17 +1,23 @@
 
+import re
 import pytest
-from flask import json
 from app import create_app
 
+# Matches the health status in compact or indented JSON output
+_HEALTHY_RE = re.compile(rb'"status":\s*"healthy"')
+
+pytestmark = pytest.mark.unit
+
 def test_create_app():
     """Test that the app is created correctly."""
     app = create_app("testing")
     assert app is not None
     assert app.config["TESTING"] is True
 
+@pytest.mark.thread_unsafe
 def test_health_check(client):
     """Test the health check endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
-    data = json.loads(response.data)
-    assert data["status"] == "healthy"
+    # The body shape is fixed, so match the raw bytes instead of parsing JSON
+    assert _HEALTHY_RE.search(response.data)
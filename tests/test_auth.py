@@ -1,108 +1,110 @@
 
 import pytest
-from flask import json
-from unittest.mock import patch
+
+# Tests share the session-wide service stubs, which each test reconfigures
+pytestmark = [pytest.mark.unit, pytest.mark.thread_unsafe]
+
+# Request bodies serialized once at import
+REGISTER_BODY = b'{"email":"test@example.com","password":"ValidPassword123!","terms_accepted":true}'
+LOGIN_BODY = b'{"email":"test@example.com","password":"ValidPassword123!"}'
+INVALID_LOGIN_BODY = b'{"email":"test@example.com","password":"InvalidPassword"}'
+UNKNOWN_LOGIN_BODY = b'{"email":"nonexistent@example.com","password":"SomePassword"}'
+
+# Shared stub return value
+_STRENGTH_OK = {"valid": True}
 
 @pytest.fixture
-def mock_firebase_service():
+def mock_firebase_service(_patch_services):
     """Mock the firebase service."""
-    with patch("app.api.auth.firebase_service") as mock:
-        yield mock
+    mock = _patch_services.firebase_service
+    mock.reset_mock(return_value=True, side_effect=True)
+    return mock
 
 @pytest.fixture
-def mock_password_security():
+def mock_password_security(_patch_services):
     """Mock the password security functions."""
-    with patch("app.api.auth.password_security") as mock:
-        mock.check_password_strength.return_value = {"valid": True}
-        yield mock
+    stub = _patch_services.password_security
+    stub.check_password_strength = lambda password: _STRENGTH_OK
+    stub.hash_password = lambda password: "hashed_password"
+    stub.verify_password = lambda password, password_hash: True
+    stub.needs_rehash = lambda password_hash: False
+    return stub
 
 @pytest.fixture
-def mock_anonymization_service():
+def mock_anonymization_service(_patch_services):
     """Mock the anonymization service."""
-    with patch("app.api.auth.anonymization_service") as mock:
-        mock.generate_anonymous_id.return_value = "test_user_id"
-        yield mock
-
-def test_register_success(client, mock_firebase_service, mock_password_security, mock_anonymization_service):
-    """Test successful user registration."""
-    mock_firebase_service.get_user_profile.return_value = None
-    mock_firebase_service.create_user_profile.return_value = "test_user_id"
-
-    data = {
-        "email": "test@example.com",
-        "password": "ValidPassword123!",
-        "terms_accepted": True
-    }
-    response = client.post("/api/auth/register", data=json.dumps(data), content_type="application/json")
+    mock = _patch_services.anonymization_service
+    mock.reset_mock(return_value=True, side_effect=True)
+    mock.generate_anonymous_id.return_value = "test_user_id"
+    return mock
 
-    assert response.status_code == 201
-    response_data = json.loads(response.data)
-    assert response_data["message"] == "Registration successful"
-    assert response_data["user_id"] == "test_user_id"
+def _setup_new_user(firebase_service, password_security):
+    firebase_service.get_user_profile_sync.return_value = None
+    firebase_service.create_user_profile.return_value = "test_user_id"
 
-def test_register_existing_user(client, mock_firebase_service, mock_password_security, mock_anonymization_service):
-    """Test registration with an existing email."""
-    mock_firebase_service.get_user_profile.return_value = {"id": "test_user_id"}
+def _setup_existing_user(firebase_service, password_security):
+    firebase_service.get_user_profile_sync.return_value = {"id": "test_user_id"}
 
-    data = {
-        "email": "test@example.com",
-        "password": "ValidPassword123!",
-        "terms_accepted": True
-    }
-    response = client.post("/api/auth/register", data=json.dumps(data), content_type="application/json")
-
-    assert response.status_code == 409
-    response_data = json.loads(response.data)
-    assert response_data["error"] == "User already exists"
-
-def test_login_success(client, mock_firebase_service, mock_password_security, mock_anonymization_service):
-    """Test successful user login."""
-    mock_firebase_service.get_user_profile.return_value = {
+def _setup_valid_login(firebase_service, password_security):
+    firebase_service.get_user_profile_sync.return_value = {
         "id": "test_user_id",
         "password_hash": "hashed_password",
         "onboarding_completed": True
     }
-    mock_password_security.verify_password.return_value = True
-
-    data = {
-        "email": "test@example.com",
-        "password": "ValidPassword123!"
-    }
-    response = client.post("/api/auth/login", data=json.dumps(data), content_type="application/json")
+    password_security.verify_password = lambda password, password_hash: True
 
-    assert response.status_code == 200
-    response_data = json.loads(response.data)
-    assert response_data["message"] == "Login successful"
-    assert response_data["user_id"] == "test_user_id"
-
-def test_login_invalid_credentials(client, mock_firebase_service, mock_password_security, mock_anonymization_service):
-    """Test login with invalid credentials."""
-    mock_firebase_service.get_user_profile.return_value = {
+def _setup_invalid_login(firebase_service, password_security):
+    firebase_service.get_user_profile_sync.return_value = {
         "id": "test_user_id",
         "password_hash": "hashed_password"
     }
-    mock_password_security.verify_password.return_value = False
-
-    data = {
-        "email": "test@example.com",
-        "password": "InvalidPassword"
-    }
-    response = client.post("/api/auth/login", data=json.dumps(data), content_type="application/json")
-
-    assert response.status_code == 401
-    response_data = json.loads(response.data)
-    assert response_data["error"] == "Invalid credentials"
+    password_security.verify_password = lambda password, password_hash: False
+
+def _setup_unknown_user(firebase_service, password_security):
+    firebase_service.get_user_profile_sync.return_value = None
+
+AUTH_CASES = [
+    pytest.param("/api/auth/register", REGISTER_BODY, _setup_new_user, 201,
+                 {"message": "Registration successful", "user_id": "test_user_id"},
+                 id="register_success"),
+    pytest.param("/api/auth/register", REGISTER_BODY, _setup_existing_user, 409,
+                 {"error": "User already exists"},
+                 id="register_existing_user"),
+    pytest.param("/api/auth/login", LOGIN_BODY, _setup_valid_login, 200,
+                 {"message": "Login successful", "user_id": "test_user_id"},
+                 id="login_success"),
+    pytest.param("/api/auth/login", INVALID_LOGIN_BODY, _setup_invalid_login, 401,
+                 {"error": "Invalid credentials"},
+                 id="login_invalid_credentials"),
+    pytest.param("/api/auth/login", UNKNOWN_LOGIN_BODY, _setup_unknown_user, 401,
+                 {"error": "Invalid credentials"},
+                 id="login_non_existent_user"),
+]
+
+@pytest.mark.parametrize("endpoint,body,mock_setup,expected_status,expected", AUTH_CASES)
+def test_auth_endpoint(client, mock_firebase_service, mock_password_security, mock_anonymization_service,
+                       endpoint, body, mock_setup, expected_status, expected):
+    """Test registration and login outcomes."""
+    mock_setup(mock_firebase_service, mock_password_security)
+
+    response = client.post(endpoint, data=body, content_type="application/json")
+
+    assert response.status_code == expected_status
+    response_data = response.get_json()
+    for key, value in expected.items():
+        assert response_data[key] == value
+
+@pytest.mark.parametrize("needs_rehash", [False, True])
+def test_login_rehashes_outdated_hash(client, mock_firebase_service, mock_password_security,
+                                      mock_anonymization_service, needs_rehash):
+    """Test that login stores a new hash only when the stored one is outdated."""
+    _setup_valid_login(mock_firebase_service, mock_password_security)
+    mock_password_security.needs_rehash = lambda password_hash: needs_rehash
+
+    response = client.post("/api/auth/login", data=LOGIN_BODY, content_type="application/json")
 
-def test_login_non_existent_user(client, mock_firebase_service, mock_anonymization_service):
-    """Test login with a non-existent user."""
-    mock_firebase_service.get_user_profile.return_value = None
-
-    data = {
-        "email": "nonexistent@example.com",
-        "password": "SomePassword"
-    }
-    response = client.post("/api/auth/login", data=json.dumps(data), content_type="application/json")
-
-    assert response.status_code == 401
-    response_data = json.loads(response.data)
-    assert response_data["error"] == "Invalid credentials"
+    assert response.status_code == 200
+    updates = mock_firebase_service.update_user_profile_sync.call_args.args[1]
+    assert ("password_hash" in updates) is needs_rehash
+    if needs_rehash:
+        assert updates["password_hash"] == "hashed_password"
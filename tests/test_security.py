@@ -0,0 +1,107 @@
+
+import base64
+import os
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from app.utils.security import DataEncryption, PasswordSecurity
+
+pytestmark = pytest.mark.unit
+
+# Hashes written by the previous passlib CryptContext for "LegacyPassword123!":
+# one with the current cost parameters and one with weaker ones
+PASSLIB_HASH = "$argon2id$v=19$m=65536,t=3,p=1$oBTCuBcCQOi9t7YWgrD2/g$VKMrfrjL0Jsa+dneD9jyvGBNe/hIRELXdydLCidAGVk"
+PASSLIB_WEAK_HASH = "$argon2id$v=19$m=1024,t=1,p=1$m1MqJYTwnhMC4BzD+P+/Nw$lq2emgH7QWeJsgr7CoGZLqhLWJwYSrvuvKUdWdoinaA"
+
+@pytest.fixture
+def fernet_key():
+    """A key in the legacy Fernet format."""
+    return Fernet.generate_key()
+
+@pytest.fixture
+def encryption(fernet_key):
+    return DataEncryption(fernet_key.decode())
+
+@pytest.fixture(scope="module")
+def passwords():
+    return PasswordSecurity()
+
+def test_encrypt_round_trip(encryption):
+    """Test that strings are sealed with AES-GCM and decrypt back."""
+    token = encryption.encrypt("sensitive note")
+    assert token.startswith("gcm1:")
+    assert encryption.encrypt("sensitive note") != token
+    assert encryption.decrypt(token) == "sensitive note"
+
+def test_aead_key_is_derived(encryption, fernet_key):
+    """Test that AES-GCM does not use the raw key shared with Fernet."""
+    raw = base64.urlsafe_b64decode(encryption.encrypt("sensitive note")[len("gcm1:"):])
+    with pytest.raises(InvalidTag):
+        AESGCM(base64.urlsafe_b64decode(fernet_key)).decrypt(raw[:12], raw[12:], None)
+
+def test_encrypt_dict_round_trip(encryption):
+    """Test that dict fields keep their JSON types through encryption."""
+    data = {"user_id": "u1", "scores": {"focus": 4, "tags": ["a", "b"]}, "notes": "text", "empty": ""}
+    encrypted = encryption.encrypt_dict(data, ["scores", "notes", "empty", "missing"])
+    assert encrypted["scores"].startswith("gcmj:")
+    assert encrypted["notes"].startswith("gcmj:")
+    assert encrypted["user_id"] == "u1"
+    assert encrypted["empty"] == ""
+    assert data["scores"] == {"focus": 4, "tags": ["a", "b"]}
+    assert encryption.decrypt_dict(encrypted, ["scores", "notes", "empty", "missing"]) == data
+
+def test_encrypt_dict_non_str_keys(encryption):
+    """Test that nested dicts with int keys encrypt, as with json.dumps."""
+    encrypted = encryption.encrypt_dict({"scores": {1: 4, 2: 5}}, ["scores"])
+    assert encryption.decrypt_dict(encrypted, ["scores"]) == {"scores": {"1": 4, "2": 5}}
+
+def test_encrypt_dict_inplace(encryption):
+    """Test that inplace=True returns the same dict."""
+    data = {"notes": "text"}
+    assert encryption.encrypt_dict(data, ["notes"], inplace=True) is data
+    assert encryption.decrypt_dict(data, ["notes"], inplace=True) is data
+    assert data == {"notes": "text"}
+
+def test_decrypt_legacy_fernet(encryption, fernet_key):
+    """Test that tokens written by the Fernet implementation still decrypt."""
+    legacy = Fernet(fernet_key)
+    assert encryption.decrypt(legacy.encrypt(b"old note").decode()) == "old note"
+    record = {"notes": legacy.encrypt(b"{'focus': 4}").decode()}
+    assert encryption.decrypt_dict(record, ["notes"]) == {"notes": "{'focus': 4}"}
+
+def test_legacy_environment_key(monkeypatch, fernet_key):
+    """Test that a base64-encoded Fernet key in the environment is accepted."""
+    monkeypatch.setenv("DATA_ENCRYPTION_KEY", base64.urlsafe_b64encode(fernet_key).decode())
+    encryption = DataEncryption()
+    token = Fernet(fernet_key).encrypt(b"old note").decode()
+    assert encryption.decrypt(token) == "old note"
+    assert encryption.decrypt(encryption.encrypt("new note")) == "new note"
+
+def test_decrypt_rejects_tampering(encryption):
+    """Test that a modified or foreign token raises ValueError."""
+    token = encryption.encrypt("sensitive note")
+    with pytest.raises(ValueError):
+        encryption.decrypt(token[:-4] + "AAAA")
+    with pytest.raises(ValueError):
+        DataEncryption(base64.urlsafe_b64encode(os.urandom(32)).decode()).decrypt(token)
+
+def test_password_round_trip(passwords):
+    """Test that argon2 hashes verify and reject wrong passwords."""
+    password_hash = passwords.hash_password("ValidPassword123!")
+    assert password_hash.startswith("$argon2id$")
+    assert passwords.verify_password("ValidPassword123!", password_hash)
+    assert not passwords.verify_password("WrongPassword123!", password_hash)
+    assert not passwords.needs_rehash(password_hash)
+
+def test_verify_passlib_hash(passwords):
+    """Test that hashes written through passlib still verify."""
+    assert passwords.verify_password("LegacyPassword123!", PASSLIB_HASH)
+    assert not passwords.verify_password("WrongPassword123!", PASSLIB_HASH)
+    assert not passwords.needs_rehash(PASSLIB_HASH)
+    assert passwords.verify_password("LegacyPassword123!", PASSLIB_WEAK_HASH)
+    assert passwords.needs_rehash(PASSLIB_WEAK_HASH)
+
+def test_verify_malformed_hash(passwords):
+    """Test that a malformed hash is rejected rather than raising."""
+    assert not passwords.verify_password("ValidPassword123!", "not-a-hash")
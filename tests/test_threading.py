@@ -0,0 +1,38 @@
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app import create_app
+
+# pytest-flask's autouse fixtures request monkeypatch, so pytest-run-parallel
+# runs every test in the session single-threaded; these checks start their
+# own threads instead
+pytestmark = pytest.mark.unit
+
+THREADS = 4
+
+def _run_concurrently(fn):
+    """Call fn from THREADS threads released at the same moment."""
+    barrier = threading.Barrier(THREADS)
+
+    def worker(_):
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        return list(pool.map(worker, range(THREADS)))
+
+def test_create_app_concurrently():
+    """Test that apps created from several threads at once are complete and independent."""
+    apps = _run_concurrently(lambda: create_app("testing"))
+    assert len({id(app) for app in apps}) == THREADS
+    rules = {str(rule) for rule in apps[0].url_map.iter_rules()}
+    for app in apps:
+        assert app.config["TESTING"] is True
+        assert app.blueprints.keys() == apps[0].blueprints.keys()
+        assert {str(rule) for rule in app.url_map.iter_rules()} == rules
+
+def test_health_check_concurrently(app):
+    """Test that one app serves requests from several threads at once."""
+    responses = _run_concurrently(lambda: app.test_client().get("/health"))
+    assert [response.status_code for response in responses] == [200] * THREADS
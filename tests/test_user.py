@@ -1,6 +1,8 @@
 
 import pytest
-from flask import json
+
+# A test client must not be shared between threads
+pytestmark = [pytest.mark.unit, pytest.mark.thread_unsafe]
 
 def test_get_profile_requires_auth(client):
     """Test that getting a profile requires authentication."""
@@ -9,5 +11,5 @@ def test_get_profile_requires_auth(client):
 
 def test_update_profile_requires_auth(client):
     """Test that updating a profile requires authentication."""
-    response = client.put("/api/user/profile", data=json.dumps({}), content_type="application/json")
+    response = client.put("/api/user/profile", json={})
     assert response.status_code == 401